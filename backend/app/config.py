@@ -34,7 +34,15 @@ class Settings(BaseSettings):
     
     # AI Models
     WHISPER_MODEL: str = "base"  # tiny, base, small, medium, large
+    WHISPER_DEVICE: str = "auto"  # auto (CUDA when available), cuda or cpu
     NLP_MODEL: str = "en_core_web_sm"
+    LAZY_LOAD_MODELS: bool = False  # True skips model warm-up at startup
+    IMAGE_PREDICTION_CACHE_SIZE: int = 2048  # 0 disables the cache
+    IMAGE_BATCH_MAX_SIZE: int = 32  # concurrent analyses coalesced per model call
+    IMAGE_BATCH_MAX_WAIT_MS: int = 10
+    PREDICTION_BATCH_MAX_SIZE: int = 32  # concurrent diagnoses coalesced per XGBoost call
+    PREDICTION_BATCH_MAX_WAIT_MS: int = 5
+    PREDICTION_CACHE_SIZE: int = 1024  # 0 disables the cache
     
     # File Upload
     MAX_IMAGE_SIZE_MB: int = 10
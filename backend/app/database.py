@@ -49,9 +49,19 @@ class Database:
         await cls.db.tokens.create_index("token_number", unique=True)
         await cls.db.tokens.create_index("status")
         await cls.db.tokens.create_index("issued_at")
+        # Queue display / call-next: status match, priority+time sort, today's range
+        await cls.db.tokens.create_index([("status", 1), ("priority", -1), ("issued_at", 1)])
+        # Doctor's active tokens, newest call first
+        await cls.db.tokens.create_index([("called_by", 1), ("status", 1), ("called_at", -1)])
         
         # Patients collection indexes
         await cls.db.patients.create_index("owner_phone")
+        await cls.db.patients.create_index("species")
+        await cls.db.patients.create_index("owner.phone")
+        await cls.db.patients.create_index([("created_at", -1)])
+        
+        # Audio collection indexes (transcription reuse for identical uploads)
+        await cls.db.audio.create_index("content_hash")
         
         # Clinical records indexes
         await cls.db.clinical_records.create_index("patient_id")
@@ -10,6 +10,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 import os
+import asyncio
 import traceback
 
 from .config import get_settings
@@ -39,6 +40,17 @@ async def lifespan(app: FastAPI):
     # Create upload directory
     os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
     
+    # Warm AI models so the first request doesn't pay load/trace latency
+    if not settings.LAZY_LOAD_MODELS:
+        from .services.image_service import warm_up_disease_model
+        from .services.prediction_service import warm_up_prediction_model
+        from .services.voice_service import warm_up_whisper_model
+        await asyncio.gather(
+            asyncio.to_thread(warm_up_disease_model),
+            asyncio.to_thread(warm_up_prediction_model),
+            asyncio.to_thread(warm_up_whisper_model),
+        )
+    
     yield
     
     # Shutdown
@@ -16,7 +16,7 @@ from ..models.diagnosis import (
 from ..models.user import User
 from ..services.clinical_service import ClinicalService
 from ..services.prediction_service import (
-    predict_diseases,
+    predict_diseases_async,
     get_followup_symptoms,
     refine_predictions
 )
@@ -43,7 +43,7 @@ async def get_ai_prediction(request: DiagnosisRequest) -> dict:
     all_symptoms = list(dict.fromkeys(all_symptoms))
 
     # Call trained model
-    predictions = predict_diseases(
+    predictions = await predict_diseases_async(
         species=request.species,
         breed=request.breed,
         symptoms=all_symptoms,
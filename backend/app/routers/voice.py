@@ -54,12 +54,9 @@ async def upload_audio(
     Maximum file size: 25MB
     """
     try:
-        # Read file content
-        content = await file.read()
-        
-        # Save audio
+        # Save audio (streamed to disk, not read into memory)
         metadata = await voice_service.save_audio(
-            file_content=content,
+            upload=file.file,
             filename=file.filename
         )
         
@@ -113,11 +110,28 @@ async def transcribe_audio(
         )
     
     try:
-        # Run transcription
-        transcription = await voice_service.transcribe(
-            audio_path=audio["audio_path"],
-            language=language
-        )
+        # Re-uploads of the same recording reuse its real transcription
+        transcription = None
+        if audio.get("content_hash"):
+            previous = await audio_collection.find_one(
+                {
+                    "content_hash": audio["content_hash"],
+                    "transcription.language": language,
+                    "transcription.error": {"$exists": False},
+                    "transcription.is_demo": {"$ne": True}
+                },
+                projection={"transcription": 1}
+            )
+            if previous:
+                transcription = previous["transcription"]
+        
+        if transcription is None:
+            # Run transcription
+            transcription = await voice_service.transcribe(
+                audio_path=audio["audio_path"],
+                language=language,
+                waveform_path=audio.get("waveform_path")
+            )
         
         # Update database with transcription
         await audio_collection.update_one(
@@ -0,0 +1,75 @@
+"""
+Micro-batching for model inference.
+
+Concurrent requests that each need one model row are coalesced into a
+single batched call, amortizing per-call overhead of the model runtime.
+"""
+
+import asyncio
+from concurrent.futures import Executor
+from typing import Callable, Optional
+
+import numpy as np
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-row predictions into one model call.
+
+    Requests are queued with a future; a background task takes up to
+    max_size of them (waiting at most max_wait_ms after the first), runs
+    predict_fn once on the stacked batch in executor and resolves each
+    future with its row of the output. A failed call fails every request
+    in that batch.
+    """
+
+    def __init__(
+        self,
+        predict_fn: Callable[[np.ndarray], np.ndarray],
+        executor: Executor,
+        max_size: int,
+        max_wait_ms: int
+    ):
+        self.predict_fn = predict_fn
+        self.executor = executor
+        self.max_size = max(1, max_size)
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    async def infer(self, x: np.ndarray) -> np.ndarray:
+        """Return the output row for a single (1, ...) input."""
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((x, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            pending = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(pending) < self.max_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    pending.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            batch = np.concatenate([x for x, _ in pending])
+            try:
+                outputs = await loop.run_in_executor(self.executor, self.predict_fn, batch)
+            except Exception as e:
+                for _, future in pending:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (_, future), row in zip(pending, outputs):
+                if not future.done():
+                    future.set_result(row)
@@ -7,6 +7,10 @@ for image-based disease prediction on uploaded clinical images.
 import os
 import uuid
 import pickle
+import asyncio
+import hashlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Optional, Dict, Any, List, Tuple
 from pathlib import Path
@@ -15,37 +19,131 @@ import cv2
 import numpy as np
 from PIL import Image
 
+from ..config import get_settings
+from .batching import MicroBatcher
+
+settings = get_settings()
+
 # ─────────────────────────────────────────────────────────────────────
 # Lazy-loaded model globals
 # ─────────────────────────────────────────────────────────────────────
 
 _disease_model = None
+_predict_fn = None            # callable: (N,224,224,3) batch → (N, num_classes)
+_backend = None               # "onnxruntime-int8" or "tensorflow"
 _idx_to_class = None          # dict[int, str]  (index → disease name)
+_class_names = []             # list[str] positional view of _idx_to_class
 _num_classes = 0
 
 MODEL_DIR = os.path.join(
     os.path.dirname(__file__), '..', '..', 'Antigravity_Package'
 )
 MODEL_PATH = os.path.join(MODEL_DIR, 'vet_densenet_model.keras')
+# Produced offline by convert_model_onnx.py; used instead of Keras if present
+ONNX_MODEL_PATH = os.path.join(MODEL_DIR, 'vet_densenet_model_int8.onnx')
 LABELS_PATH = os.path.join(MODEL_DIR, 'labels.pkl')
 
 INPUT_SIZE = 224  # DenseNet121 expects 224×224
 
+# Analysis only needs INPUT_SIZE pixels, so large JPEGs are decoded at 1/2 or
+# 1/4 scale directly in the DCT domain, as long as the short side stays at or
+# above this floor.
+MIN_DECODE_SIDE = 2 * INPUT_SIZE
+_REDUCED_DECODE_FLAGS = (
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+
+# Bounded LRU of model outputs keyed by a SHA1 of the preprocessed input —
+# the same clinical photo is often re-analyzed from the diagnosis screen.
+_prediction_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+
+# Decode/preprocess runs on a CPU pool (OpenCV releases the GIL) while
+# inference gets a single worker — TensorFlow already parallelizes each
+# predict() internally, so more workers would only oversubscribe cores.
+CV_POOL = ThreadPoolExecutor(max_workers=os.cpu_count(), thread_name_prefix="vetai-cv")
+MODEL_POOL = ThreadPoolExecutor(max_workers=1, thread_name_prefix="vetai-model")
+
+# Run OpenCV resizes through the transparent API (UMat) when an OpenCL
+# device is present; otherwise everything stays on plain arrays.
+USE_OPENCL = cv2.ocl.haveOpenCL()
+if USE_OPENCL:
+    cv2.ocl.setUseOpenCL(True)
+
+
+def _resize(img: np.ndarray, dsize: Tuple[int, int], interpolation: int = cv2.INTER_LINEAR) -> np.ndarray:
+    """cv2.resize through a UMat when OpenCL is on, falling back to the CPU."""
+    if USE_OPENCL:
+        try:
+            return cv2.resize(cv2.UMat(img), dsize, interpolation=interpolation).get()
+        except cv2.error as e:
+            print(f"WARNING: OpenCL resize failed, using CPU: {e}")
+    return cv2.resize(img, dsize, interpolation=interpolation)
+
+
+def _load_onnx_model():
+    """Load the INT8-quantized ONNX export. Returns (session, predict_fn)."""
+    import onnxruntime as ort
+
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = os.cpu_count() or 1
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    session = ort.InferenceSession(
+        ONNX_MODEL_PATH, sess_options=options, providers=["CPUExecutionProvider"]
+    )
+    input_name = session.get_inputs()[0].name
+
+    def predict(batch: np.ndarray) -> np.ndarray:
+        return session.run(None, {input_name: batch})[0]
+
+    return session, predict
 
 
+def _load_keras_model():
+    """Load the FP32 Keras model. Returns (model, predict_fn)."""
+    import tensorflow as tf
+
+    model = tf.keras.models.load_model(MODEL_PATH)
+
+    # Call the model inside a traced graph instead of model.predict(),
+    # which rebuilds a data adapter and batching loop on every call. The
+    # batch dimension stays dynamic so the batcher doesn't force retraces.
+    @tf.function(input_signature=[
+        tf.TensorSpec((None, INPUT_SIZE, INPUT_SIZE, 3), tf.float32)
+    ])
+    def graph_fn(batch):
+        return model(batch, training=False)
+
+    # Trace now and call the concrete function directly, skipping
+    # tf.function's per-call signature dispatch.
+    concrete_fn = graph_fn.get_concrete_function()
+
+    def predict(batch: np.ndarray) -> np.ndarray:
+        return concrete_fn(tf.constant(batch)).numpy()
+
+    return model, predict
+
 
 def _load_disease_model():
     """Lazy-load the DenseNet121 disease detection model and label map."""
-    global _disease_model, _idx_to_class, _num_classes
+    global _disease_model, _predict_fn, _backend
+    global _idx_to_class, _class_names, _num_classes
 
     if _disease_model is not None:
         return True
 
     try:
-        import tensorflow as tf
-
         print("Loading DenseNet121 veterinary disease detection model...")
-        _disease_model = tf.keras.models.load_model(MODEL_PATH)
+        _disease_model = None
+        if os.path.exists(ONNX_MODEL_PATH):
+            try:
+                _disease_model, _predict_fn = _load_onnx_model()
+                _backend = "onnxruntime-int8"
+            except Exception as e:
+                print(f"WARNING: ONNX model unavailable, using Keras: {e}")
+        if _disease_model is None:
+            _disease_model, _predict_fn = _load_keras_model()
+            _backend = "tensorflow"
 
         with open(LABELS_PATH, 'rb') as f:
             label_map = pickle.load(f)   # dict[str, int]: name → index
@@ -53,8 +151,12 @@ def _load_disease_model():
         # Build index → class name mapping (same logic as inference.py)
         _idx_to_class = {v: k for k, v in label_map.items()}
         _num_classes = len(_idx_to_class)
+        _class_names = [
+            _idx_to_class.get(i, f"class_{i}")
+            for i in range(max(_idx_to_class) + 1)
+        ]
 
-        print(f"SUCCESS: DenseNet121 model loaded with {_num_classes} classes")
+        print(f"SUCCESS: DenseNet121 model loaded ({_backend}) with {_num_classes} classes")
         print(f"  Label mapping: {_idx_to_class}")
         return True
 
@@ -63,9 +165,29 @@ def _load_disease_model():
         import traceback
         traceback.print_exc()
         _disease_model = None
+        _predict_fn = None
         return False
 
 
+def warm_up_disease_model():
+    """Load the model and run one dummy batch so the first request is fast."""
+    if _load_disease_model():
+        try:
+            _predict_fn(np.zeros((1, INPUT_SIZE, INPUT_SIZE, 3), dtype=np.float32))
+        except Exception as e:
+            # Leave the error to surface on /analyze instead of aborting startup
+            print(f"WARNING: DenseNet121 warm-up failed: {e}")
+
+
+# _predict_fn is bound lazily by _load_disease_model, so look it up per batch
+inference_batcher = MicroBatcher(
+    lambda batch: _predict_fn(batch),
+    MODEL_POOL,
+    settings.IMAGE_BATCH_MAX_SIZE,
+    settings.IMAGE_BATCH_MAX_WAIT_MS
+)
+
+
 class ImageAnalyzer:
     """Analyzes veterinary clinical images using trained DenseNet121 model."""
 
@@ -101,20 +223,13 @@ class ImageAnalyzer:
         image_id = str(uuid.uuid4())
         date_folder = datetime.now().strftime("%Y-%m-%d")
         save_dir = self.upload_dir / date_folder
-        save_dir.mkdir(parents=True, exist_ok=True)
-
-        # Save original
         original_path = save_dir / f"{image_id}_original{ext}"
-        with open(original_path, 'wb') as f:
-            f.write(file_content)
-
-        # Create thumbnail
         thumb_path = save_dir / f"{image_id}_thumb.jpg"
-        self._create_thumbnail(original_path, thumb_path)
 
-        # Get image dimensions
-        with Image.open(original_path) as img:
-            width, height = img.size
+        # Decode, write and thumbnail off the event loop
+        width, height = await asyncio.get_running_loop().run_in_executor(
+            CV_POOL, self._store_upload, file_content, save_dir, original_path, thumb_path
+        )
 
         return {
             "image_id": image_id,
@@ -128,13 +243,44 @@ class ImageAnalyzer:
             "uploaded_at": datetime.utcnow().isoformat()
         }
 
-    def _create_thumbnail(self, source_path: Path, thumb_path: Path, size: Tuple[int, int] = (200, 200)):
-        """Create a thumbnail of the image."""
-        with Image.open(source_path) as img:
-            img.thumbnail(size, Image.Resampling.LANCZOS)
-            if img.mode in ('RGBA', 'P'):
-                img = img.convert('RGB')
-            img.save(thumb_path, 'JPEG', quality=85)
+    def _store_upload(
+        self, file_content: bytes, save_dir: Path, original_path: Path, thumb_path: Path
+    ) -> Tuple[int, int]:
+        """Blocking part of save_image. Returns the original (width, height)."""
+        # Decode once from memory; dimensions and thumbnail come from this
+        # array. EXIF orientation is ignored so both match the stored pixel
+        # layout, as PIL's Image.size and thumbnail() did.
+        cv_img = cv2.imdecode(
+            np.frombuffer(file_content, np.uint8),
+            cv2.IMREAD_COLOR | cv2.IMREAD_IGNORE_ORIENTATION
+        )
+        if cv_img is None:
+            raise ValueError("Invalid image: file could not be decoded")
+
+        thumb_bytes = self._create_thumbnail(cv_img)
+
+        save_dir.mkdir(parents=True, exist_ok=True)
+        with open(original_path, 'wb') as f:
+            f.write(file_content)
+        with open(thumb_path, 'wb') as f:
+            f.write(thumb_bytes)
+
+        height, width = cv_img.shape[:2]
+        return width, height
+
+    def _create_thumbnail(self, cv_img: np.ndarray, size: Tuple[int, int] = (200, 200)) -> bytes:
+        """Encode a JPEG thumbnail of a decoded BGR image (never upscales)."""
+        h, w = cv_img.shape[:2]
+        scale = min(size[0] / w, size[1] / h, 1.0)
+        thumb = _resize(
+            cv_img,
+            (max(1, int(w * scale)), max(1, int(h * scale))),
+            interpolation=cv2.INTER_AREA
+        )
+        ok, buf = cv2.imencode(".jpg", thumb, [cv2.IMWRITE_JPEG_QUALITY, 85])
+        if not ok:
+            raise ValueError("Failed to encode thumbnail")
+        return buf.tobytes()
 
     # ─────────────────────────────────────────────────────────────────
     # DenseNet121 disease detection pipeline
@@ -157,12 +303,23 @@ class ImageAnalyzer:
                 f"Ensure '{MODEL_PATH}' and '{LABELS_PATH}' exist."
             )
 
+        loop = asyncio.get_running_loop()
+
         # Load and preprocess image for DenseNet121 (224×224)
-        img_batch = self._preprocess_for_model(image_path)
+        cv_img = await loop.run_in_executor(
+            CV_POOL, self._decode_for_analysis, image_path
+        )
+        img_batch = await loop.run_in_executor(
+            CV_POOL, self._preprocess_for_model, cv_img
+        )
 
-        # Run inference
-        predictions = _disease_model.predict(img_batch, verbose=0)
-        probabilities = predictions[0].copy()  # shape: (num_classes,)
+        cache_key = hashlib.sha1(img_batch.tobytes()).hexdigest()
+        probabilities = self._cached_prediction(cache_key)
+
+        if probabilities is None:
+            # Run inference off the event loop, batched with concurrent requests
+            probabilities = await inference_batcher.infer(img_batch)  # (num_classes,)
+            self._store_prediction(cache_key, probabilities)
 
         # Build ranked prediction list
         ranked = self._build_predictions(probabilities)
@@ -177,29 +334,67 @@ class ImageAnalyzer:
                 "name": "DenseNet121",
                 "input_size": INPUT_SIZE,
                 "num_classes": _num_classes,
+                "backend": _backend,
                 "accuracy": "92.5%"
             },
             "analyzed_at": datetime.utcnow().isoformat()
         }
 
-    def _preprocess_for_model(self, image_path: str) -> np.ndarray:
+    def _cached_prediction(self, key: str) -> Optional[np.ndarray]:
+        """Return cached probabilities for a preprocessed input, if any."""
+        probabilities = _prediction_cache.get(key)
+        if probabilities is not None:
+            _prediction_cache.move_to_end(key)
+        return probabilities
+
+    def _store_prediction(self, key: str, probabilities: np.ndarray):
+        """Insert into the LRU, evicting the oldest entry when full."""
+        max_size = settings.IMAGE_PREDICTION_CACHE_SIZE
+        if max_size <= 0:
+            return
+        _prediction_cache[key] = probabilities
+        if len(_prediction_cache) > max_size:
+            _prediction_cache.popitem(last=False)
+
+    def _preprocess_for_model(self, cv_img: np.ndarray) -> np.ndarray:
+        """
+        Preprocess an already-decoded BGR image for DenseNet121 — same
+        result as inference.py (BGR → RGB, resize to 224×224, float32 / 255.0,
+        batch dimension), but resizing first so every later step touches
+        only 224×224 pixels. Resize is per-channel, so the order is exact.
+        """
+        small = self._resize_to_input(cv_img)
+
+        # BGR → RGB via a reversed-channel view, cast and scale in one pass
+        img_batch = np.empty((1, INPUT_SIZE, INPUT_SIZE, 3), dtype=np.float32)
+        np.divide(small[..., ::-1], 255.0, out=img_batch[0], dtype=np.float32)
+        return img_batch
+
+    def _decode_for_analysis(self, image_path: str) -> np.ndarray:
         """
-        Preprocess image for DenseNet121 — follows inference.py exactly:
-        1. Read with cv2.imread()
-        2. Convert BGR → RGB
-        3. Resize to 224×224
-        4. Scale to float32 / 255.0
-        5. Add batch dimension
+        Decode at the coarsest JPEG scale that still leaves the short side
+        at least MIN_DECODE_SIDE. Only the header is read to pick the scale,
+        so the file is decoded exactly once.
         """
-        img = cv2.imread(image_path)
+        flags = cv2.IMREAD_COLOR
+        try:
+            with Image.open(image_path) as probe:
+                short_side = min(probe.size)
+            for factor, reduced_flag in _REDUCED_DECODE_FLAGS:
+                if short_side // factor >= MIN_DECODE_SIDE:
+                    flags = reduced_flag
+                    break
+        except Exception:
+            pass  # Let cv2 decide whether the file is readable
+
+        img = cv2.imread(image_path, flags)
         if img is None:
             raise ValueError(f"Cannot read image: {image_path}")
+        return img
 
-        img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        img = cv2.resize(img, (INPUT_SIZE, INPUT_SIZE))
-        img = np.array(img, dtype=np.float32) / 255.0
-        img_batch = np.expand_dims(img, axis=0)
-        return img_batch
+    def _resize_to_input(self, img: np.ndarray) -> np.ndarray:
+        """Resize to the model input size, on the GPU if available."""
+        return _resize(img, (INPUT_SIZE, INPUT_SIZE))
 
     def _build_predictions(
         self,
@@ -216,7 +411,7 @@ class ImageAnalyzer:
         ranked = []
         for rank, idx in enumerate(sorted_indices[:top_n], start=1):
             confidence = float(probabilities[idx])
-            disease_name = _idx_to_class.get(idx, f"class_{idx}")
+            disease_name = _class_names[idx] if idx < len(_class_names) else f"class_{idx}"
             ranked.append({
                 "disease": disease_name,
                 "confidence": round(confidence, 4),
@@ -244,13 +439,19 @@ class ImageAnalyzer:
         image = await images.find_one({"image_id": image_id})
         if not image:
             return False
-        for k in ['original_path', 'thumbnail_path']:
+        await asyncio.get_running_loop().run_in_executor(
+            CV_POOL, self._remove_files, [image.get(k) for k in ('original_path', 'thumbnail_path')]
+        )
+        await images.delete_one({"image_id": image_id})
+        return True
+
+    @staticmethod
+    def _remove_files(paths: List[Optional[str]]):
+        for path in paths:
             try:
-                os.remove(image[k])
+                os.remove(path)
             except Exception:
                 pass
-        await images.delete_one({"image_id": image_id})
-        return True
 
 
 # Singleton instance
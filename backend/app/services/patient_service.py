@@ -2,9 +2,11 @@
 Patient management service.
 """
 
+import re
 from datetime import datetime
-from typing import Optional, List
+from typing import Any, ClassVar, Optional, List
 from bson import ObjectId
+from bson.errors import InvalidId
 
 from ..database import Database
 from ..models.patient import Patient, PatientCreate, PatientUpdate
@@ -13,10 +15,19 @@ from ..models.patient import Patient, PatientCreate, PatientUpdate
 class PatientService:
     """Patient management service."""
     
+    _collection: ClassVar[Optional[Any]] = None
+    
+    @classmethod
+    def _patients(cls):
+        """Patients collection, resolved once after the database connects."""
+        if cls._collection is None:
+            cls._collection = Database.get_collection("patients")
+        return cls._collection
+    
     @classmethod
     async def create_patient(cls, patient_data: PatientCreate) -> Patient:
         """Create a new patient record."""
-        patients = Database.get_collection("patients")
+        patients = cls._patients()
         
         patient_doc = {
             "name": patient_data.name,
@@ -42,12 +53,14 @@ class PatientService:
     @classmethod
     async def get_patient(cls, patient_id: str) -> Optional[Patient]:
         """Get patient by ID."""
-        patients = Database.get_collection("patients")
+        patients = cls._patients()
         
         try:
-            patient = await patients.find_one({"_id": ObjectId(patient_id)})
-        except:
+            object_id = ObjectId(patient_id)
+        except (InvalidId, TypeError):
             return None
+        
+        patient = await patients.find_one({"_id": object_id})
             
         if not patient:
             return None
@@ -58,8 +71,10 @@ class PatientService:
     @classmethod
     async def update_patient(cls, patient_id: str, updates: PatientUpdate) -> Optional[Patient]:
         """Update patient record."""
-        patients = Database.get_collection("patients")
+        patients = cls._patients()
         
+        # Only top-level None means "not provided"; nested values (e.g. an
+        # owner's email set to None) are kept so the update can clear them
         update_data = {k: v for k, v in updates.model_dump().items() if v is not None}
         if not update_data:
             return await cls.get_patient(patient_id)
@@ -82,7 +97,7 @@ class PatientService:
     @classmethod
     async def delete_patient(cls, patient_id: str) -> bool:
         """Delete patient record."""
-        patients = Database.get_collection("patients")
+        patients = cls._patients()
         result = await patients.delete_one({"_id": ObjectId(patient_id)})
         return result.deleted_count > 0
     
@@ -94,15 +109,21 @@ class PatientService:
         owner_phone: Optional[str] = None,
         limit: int = 50
     ) -> List[Patient]:
-        """Search patients with filters."""
-        patients = Database.get_collection("patients")
+        """
+        Search patients with filters.
+        
+        Name/owner queries match case-insensitive substrings, so partial
+        words typed in the search box still find "Maxwell" for "Max".
+        """
+        patients = cls._patients()
         
         filter_query = {}
         
         if query:
+            pattern = re.escape(query)
             filter_query["$or"] = [
-                {"name": {"$regex": query, "$options": "i"}},
-                {"owner.name": {"$regex": query, "$options": "i"}}
+                {"name": {"$regex": pattern, "$options": "i"}},
+                {"owner.name": {"$regex": pattern, "$options": "i"}}
             ]
         
         if species:
@@ -111,10 +132,10 @@ class PatientService:
         if owner_phone:
             filter_query["owner.phone"] = owner_phone
         
-        cursor = patients.find(filter_query).sort("created_at", -1).limit(limit)
+        docs = await patients.find(filter_query).sort("created_at", -1).to_list(length=limit)
         
         results = []
-        async for patient in cursor:
+        for patient in docs:
             patient["_id"] = str(patient["_id"])
             results.append(Patient(**patient))
         
@@ -5,59 +5,199 @@ and provides disease predictions with symptom verification checklists.
 """
 
 import os
+import copy
 import json
+import pickle
+import threading
 import warnings
+from bisect import bisect_right
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import compress
 import numpy as np
 from typing import List, Dict, Any, Optional, Tuple
 
+from ..config import get_settings
+from .batching import MicroBatcher
+
 warnings.filterwarnings('ignore')
 
+settings = get_settings()
+
 # Paths
 MODEL_DIR = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'trained_model')
+COMPILED_MODEL_PATH = os.path.join(MODEL_DIR, 'vet_ai_model.so')
+# Produced by convert_prediction_model_onnx.py; used when onnxruntime is installed
+ONNX_MODEL_PATH = os.path.join(MODEL_DIR, 'vet_ai_model.onnx')
+# Produced by bundle_prediction_artifacts.py; replaces the separate .pkl files
+ARTIFACT_BUNDLE_PATH = os.path.join(MODEL_DIR, 'prediction_artifacts.joblib')
+KB_PATH = os.path.join(MODEL_DIR, 'veterinary_knowledge.json')
+# Parsed + indexed knowledge base; rebuilt whenever the JSON is newer
+KB_CACHE_PATH = os.path.join(MODEL_DIR, 'veterinary_knowledge.cache.pkl')
+KB_CACHE_VERSION = 1
+ARTIFACT_FILES = {
+    'animal_encoder': 'animal_encoder.pkl',
+    'breed_encoder': 'breed_encoder.pkl',
+    'disease_encoder': 'disease_encoder.pkl',
+    'symptom_vectorizer': 'symptom_binarizer.pkl',
+    'vitals_scaler': 'vitals_scaler.pkl',
+    'model': 'vet_ai_model.pkl',
+}
 
 # Lazy-loaded globals
 _model = None
+_compiled_predictor = None  # tl2cgen.Predictor when vet_ai_model.so is available
+_onnx_predict = None        # onnxruntime fallback when no compiled predictor
+_booster = None             # raw XGBoost Booster behind _model (multi:softprob only)
+_iteration_range = (0, 0)   # trees predict_proba uses (early stopping cutoff)
 _animal_encoder = None
 _breed_encoder = None
+_animal_index: Dict[str, int] = {}    # LabelEncoder classes_ -> code
+_breed_index: Dict[str, int] = {}
 _disease_encoder = None
+_disease_classes = None     # model class index -> disease name
 _symptom_vectorizer = None
 _vitals_scaler = None
+_vitals_mean = None         # StandardScaler statistics, applied inline
+_vitals_inv_scale = None
 _knowledge_base = None
+_symptom_matcher = None
+_kb_arrays = None
+_n_features = 0        # model input width: 2 categorical + TF-IDF + count + 6 vitals
+_n_symptom_terms = 0   # TF-IDF vocabulary size
+_symptom_analyzer = None    # the vectorizer's own tokenizer/stop-word pipeline
+_symptom_idf = None         # per-term weights (ones when use_idf=False)
+_symptom_term_cache: Dict[str, Tuple[int, ...]] = {}
+_SYMPTOM_TERM_CACHE_MAX = 4096
+
+# Bounded LRU of ranked results keyed on the exact request inputs — the
+# same case is re-predicted as doctors revisit it from the diagnosis screen.
+_result_cache: "OrderedDict[tuple, List[Dict[str, Any]]]" = OrderedDict()
+
+# Key layout of a prediction result; copying it gives every result the
+# same pre-sized dict in the same key order, filled in place.
+_RESULT_TEMPLATE: Dict[str, Any] = {
+    "disease_name": "",
+    "probability": 0.0,
+    "confidence": "low",
+    "matched_symptoms": None,
+    "verification_symptoms": None,
+    "all_disease_symptoms": None,
+    "common_symptoms": None,
+    "species": "",
+    "urgency": "routine",
+    "symptom_confidence": 0
+}
+
+
+# Map from app's species names to model's expected names
+SPECIES_MAP = {
+    'dog': 'Dog', 'cat': 'Cat', 'horse': 'Horse', 'cow': 'Cow',
+    'pig': 'Pig', 'rabbit': 'Rabbit', 'goat': 'Goat', 'sheep': 'Sheep'
+}
+
+# Guards the one-time load; without it, concurrent first requests on
+# worker threads would each deserialize every artifact.
+_LOAD_LOCK = threading.Lock()
 
 
 def _load_artifacts():
     """Lazy-load all model artifacts once on first prediction."""
-    global _model, _animal_encoder, _breed_encoder, _disease_encoder
-    global _symptom_vectorizer, _vitals_scaler, _knowledge_base
-
     if _model is not None:
         return True
+    with _LOAD_LOCK:
+        if _model is not None:
+            return True
+        return _load_artifacts_locked()
+
+
+def _load_artifacts_locked():
+    """
+    Load every artifact; the caller holds _LOAD_LOCK. _model is published
+    last so the unlocked check in _load_artifacts never sees a partially
+    initialized service.
+    """
+    global _model, _animal_encoder, _breed_encoder, _disease_encoder
+    global _symptom_vectorizer, _vitals_scaler, _knowledge_base, _symptom_matcher, _kb_arrays
+    global _n_features, _n_symptom_terms, _symptom_analyzer, _symptom_idf
+    global _compiled_predictor, _disease_classes, _vitals_mean, _vitals_inv_scale
+    global _animal_index, _breed_index, _booster, _iteration_range, _onnx_predict
 
     try:
         import joblib
 
         print("Loading VetAI prediction model artifacts...")
 
-        _animal_encoder = joblib.load(os.path.join(MODEL_DIR, 'animal_encoder.pkl'))
-        _breed_encoder = joblib.load(os.path.join(MODEL_DIR, 'breed_encoder.pkl'))
-        _disease_encoder = joblib.load(os.path.join(MODEL_DIR, 'disease_encoder.pkl'))
-        _symptom_vectorizer = joblib.load(os.path.join(MODEL_DIR, 'symptom_binarizer.pkl'))
-        _vitals_scaler = joblib.load(os.path.join(MODEL_DIR, 'vitals_scaler.pkl'))
-        _model = joblib.load(os.path.join(MODEL_DIR, 'vet_ai_model.pkl'))
-
-        # Load knowledge base (disease -> symptoms mapping)
-        kb_path = os.path.join(MODEL_DIR, 'veterinary_knowledge.json')
-        with open(kb_path, 'r') as f:
-            kb_list = json.load(f)
-        _knowledge_base = {
-            entry['disease']: {
-                'symptoms': entry['typical_symptoms'],
-                'species': entry['species']
-            }
-            for entry in kb_list
-        }
+        # Unpickling imports each artifact's module on first use; import
+        # them here so the loader threads below don't deadlock on the
+        # package import locks (sklearn.preprocessing and friends)
+        import sklearn.feature_extraction.text
+        import sklearn.preprocessing
+        import xgboost
+
+        # The knowledge base and the pickles are independent; read them
+        # concurrently (file I/O and zlib/numpy decoding release the GIL)
+        loader = ThreadPoolExecutor(max_workers=len(ARTIFACT_FILES) + 1,
+                                    thread_name_prefix="artifact-load")
+        try:
+            kb_future = loader.submit(_read_knowledge_base)
+            if os.path.exists(ARTIFACT_BUNDLE_PATH):
+                # One file; numpy arrays are memory-mapped instead of copied
+                artifacts = joblib.load(ARTIFACT_BUNDLE_PATH, mmap_mode='r')
+            else:
+                futures = {
+                    name: loader.submit(joblib.load, os.path.join(MODEL_DIR, filename))
+                    for name, filename in ARTIFACT_FILES.items()
+                }
+                artifacts = {name: future.result() for name, future in futures.items()}
+            knowledge = kb_future.result()
+        finally:
+            loader.shutdown(wait=True)
+
+        _animal_encoder = artifacts['animal_encoder']
+        _breed_encoder = artifacts['breed_encoder']
+        _animal_index = {c: i for i, c in enumerate(_animal_encoder.classes_.tolist())}
+        _breed_index = {c: i for i, c in enumerate(_breed_encoder.classes_.tolist())}
+        _disease_encoder = artifacts['disease_encoder']
+        _disease_classes = _disease_encoder.classes_.tolist()
+        _symptom_vectorizer = artifacts['symptom_vectorizer']
+        _vitals_scaler = artifacts['vitals_scaler']
+        _vitals_mean = (
+            np.asarray(_vitals_scaler.mean_, dtype=np.float64)
+            if _vitals_scaler.with_mean else np.zeros(6)
+        )
+        _vitals_inv_scale = (
+            1.0 / np.asarray(_vitals_scaler.scale_, dtype=np.float64)
+            if _vitals_scaler.with_std else np.ones(6)
+        )
+        model = artifacts['model']
+        _n_features = int(model.n_features_in_)
+        if getattr(model, 'objective', None) == 'multi:softprob':
+            # softprob output is already the predict_proba matrix
+            _booster = model.get_booster()
+            best_iteration = getattr(model, 'best_iteration', None)
+            _iteration_range = (0, best_iteration + 1) if best_iteration is not None else (0, 0)
+        _compiled_predictor = _load_compiled_predictor()
+        if _compiled_predictor is None:
+            _onnx_predict = _load_onnx_predictor()
+        _n_symptom_terms = len(_symptom_vectorizer.vocabulary_)
+
+        # Binary unigram TF-IDF only depends on which terms each symptom
+        # contains, so term ids can be cached per symptom string instead
+        # of re-tokenizing the joined text on every request.
+        if (_symptom_vectorizer.binary and _symptom_vectorizer.ngram_range == (1, 1)
+                and _symptom_vectorizer.norm in ('l2', 'l1', None)):
+            _symptom_analyzer = _symptom_vectorizer.build_analyzer()
+            _symptom_idf = (
+                _symptom_vectorizer.idf_ if _symptom_vectorizer.use_idf
+                else np.ones(_n_symptom_terms)
+            )
+
+        # Knowledge base (disease -> symptoms mapping)
+        _knowledge_base, _symptom_matcher, _kb_arrays = knowledge
+        _model = model
 
-        print(f"SUCCESS: Model loaded: {len(_disease_encoder.classes_)} diseases, "
+        print(f"SUCCESS: Model loaded: {len(_disease_classes)} diseases, "
               f"{len(_knowledge_base)} knowledge entries")
         return True
 
@@ -69,32 +209,351 @@ def _load_artifacts():
         return False
 
 
+class _SymptomMatcher:
+    """
+    Matches input symptoms against every distinct knowledge-base phrase.
+
+    A phrase is hit when it equals an input symptom or either contains the
+    other. With pyahocorasick installed both directions run as automaton
+    scans: KB phrases found inside each input, and inputs found inside the
+    separator-joined phrase text. Otherwise the same rule is checked in
+    Python over the deduplicated phrases, behind a trigram-bitset
+    prefilter: a string can only contain another if it has all of the
+    other's trigrams, so most pairs are rejected with one integer AND
+    before any substring search.
+    """
+
+    _SEPARATOR = '\x00'
+    _QGRAM = 3
+    _QGRAM_BITS = 256
+
+    def __init__(self, phrases: List[str]):
+        self.phrases = phrases
+        self.phrase_ids = {phrase: i for i, phrase in enumerate(phrases)}
+        self._phrase_bits = [self._qgram_bits(phrase) for phrase in phrases]
+        self._ahocorasick = None
+        try:
+            import ahocorasick
+        except ImportError:
+            return
+
+        automaton = ahocorasick.Automaton()
+        for phrase_id, phrase in enumerate(phrases):
+            if phrase:
+                automaton.add_word(phrase, phrase_id)
+        if len(automaton) == 0:
+            return
+        automaton.make_automaton()
+
+        self._ahocorasick = ahocorasick
+        self._automaton = automaton
+        self._empty_ids = [i for i, phrase in enumerate(phrases) if not phrase]
+        self._text = self._SEPARATOR.join(phrases)
+        self._starts = []
+        pos = 0
+        for phrase in phrases:
+            self._starts.append(pos)
+            pos += len(phrase) + 1
+
+    def hits(self, input_symptoms_lower: frozenset) -> set:
+        """Ids of the phrases matched by any of the normalized input symptoms."""
+        if not input_symptoms_lower:
+            return set()
+        if '' in input_symptoms_lower:
+            # An empty input is contained in every phrase
+            return set(range(len(self.phrases)))
+
+        if self._ahocorasick is None:
+            inputs = [(inp, self._qgram_bits(inp)) for inp in input_symptoms_lower]
+            return {
+                i for i, (phrase, phrase_bits) in enumerate(zip(self.phrases, self._phrase_bits))
+                if phrase in input_symptoms_lower
+                or self._contains_either(phrase, phrase_bits, inputs)
+            }
+
+        hit_ids = set(self._empty_ids)
+        reverse = self._ahocorasick.Automaton()
+        for inp in input_symptoms_lower:
+            hit_ids.update(phrase_id for _, phrase_id in self._automaton.iter(inp))
+            if self._SEPARATOR not in inp:
+                reverse.add_word(inp, inp)
+        if len(reverse):
+            reverse.make_automaton()
+            for end, _ in reverse.iter(self._text):
+                hit_ids.add(bisect_right(self._starts, end) - 1)
+        return hit_ids
+
+    def matches(self, phrase: str, hit_ids: set, input_symptoms_lower: frozenset) -> bool:
+        """
+        Whether one normalized phrase is matched: by id against hits() for
+        knowledge-base phrases, by the direct rule for anything else.
+        """
+        phrase_id = self.phrase_ids.get(phrase)
+        if phrase_id is not None:
+            return phrase_id in hit_ids
+        inputs = [(inp, self._qgram_bits(inp)) for inp in input_symptoms_lower]
+        return phrase in input_symptoms_lower or self._contains_either(
+            phrase, self._qgram_bits(phrase), inputs
+        )
+
+    @classmethod
+    def _qgram_bits(cls, text: str) -> int:
+        """Hashed set of the text's trigrams as an int bitmask."""
+        bits = 0
+        for i in range(len(text) - cls._QGRAM + 1):
+            bits |= 1 << (hash(text[i:i + cls._QGRAM]) % cls._QGRAM_BITS)
+        return bits
+
+    @staticmethod
+    def _contains_either(phrase: str, phrase_bits: int, inputs: List[Tuple[str, int]]) -> bool:
+        """phrase in inp or inp in phrase for any input, bitset-prefiltered."""
+        for inp, inp_bits in inputs:
+            if not phrase_bits & ~inp_bits and phrase in inp:
+                return True
+            if not inp_bits & ~phrase_bits and inp in phrase:
+                return True
+        return False
+
+    def hit_mask(self, input_symptoms_lower: frozenset) -> np.ndarray:
+        """Boolean array over phrase ids, True where hits() matched."""
+        mask = np.zeros(len(self.phrases), dtype=bool)
+        hit_ids = self.hits(input_symptoms_lower)
+        if hit_ids:
+            mask[np.fromiter(hit_ids, dtype=np.intp, count=len(hit_ids))] = True
+        return mask
+
+
+class _KnowledgeBaseArrays:
+    """
+    Structure-of-arrays view of the knowledge base, partitioned by species:
+    each species keeps its diseases' phrase ids concatenated with
+    per-disease offsets, so a request only gathers and sums the symptoms
+    of its own species' diseases.
+    """
+
+    def __init__(self, kb: Dict[str, Dict[str, Any]]):
+        self.names = list(kb)
+        self.entries = list(kb.values())
+        self.lengths = np.array([len(e['symptom_ids']) for e in self.entries], dtype=np.int64)
+        # Where each disease's symptoms start inside its species partition
+        self._starts = np.zeros(len(self.entries), dtype=np.int64)
+
+        rows_by_species: Dict[str, List[int]] = {}
+        for i, entry in enumerate(self.entries):
+            rows_by_species.setdefault(entry['species'], []).append(i)
+
+        self._class_rows = None
+        self._class_rows_for = None
+        self._partitions: Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+        for species, rows in rows_by_species.items():
+            rows = np.array(rows, dtype=np.intp)
+            offsets = np.concatenate(([0], np.cumsum(self.lengths[rows])))
+            self._starts[rows] = offsets[:-1]
+            symptom_ids = np.concatenate([self.entries[i]['symptom_ids'] for i in rows])
+            self._partitions[species] = (rows, symptom_ids, offsets)
+
+    def score(self, hit_mask: np.ndarray, species: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        (disease indices, match counts, symptom hits) for the diseases of
+        this species with at least one matched symptom, in KB order. The
+        hits are flat over the species' symptoms; slice one disease's
+        flags with symptom_mask().
+        """
+        partition = self._partitions.get(species)
+        if partition is None:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.int64), np.empty(0, dtype=bool)
+        rows, symptom_ids, offsets = partition
+        hits = hit_mask[symptom_ids]
+        cumulative = np.concatenate(([0], np.cumsum(hits)))
+        counts = cumulative[offsets[1:]] - cumulative[offsets[:-1]]
+        matched = np.flatnonzero(counts > 0)
+        return rows[matched], counts[matched], hits
+
+    def symptom_mask(self, hits: np.ndarray, index: int) -> np.ndarray:
+        """Hit flags of one disease's symptoms, from score()'s flat hits."""
+        start = self._starts[index]
+        return hits[start:start + self.lengths[index]]
+
+    def class_rows(self, classes: List[str]) -> np.ndarray:
+        """Model output column of each disease (-1 if the model lacks it), cached."""
+        if self._class_rows_for is not classes:
+            column = {name: i for i, name in enumerate(classes)}
+            self._class_rows = np.array([column.get(name, -1) for name in self.names], dtype=np.intp)
+            self._class_rows_for = classes
+        return self._class_rows
+
+
+def warm_up_prediction_model():
+    """Load the artifacts and run one dummy prediction so the first request is fast."""
+    if _load_artifacts():
+        try:
+            _predict_proba(np.full((1, _n_features), np.nan, dtype=np.float32))
+        except Exception as e:
+            # Same degraded mode as a failing request: KB ranking without
+            # the model boost, rather than aborting startup
+            print(f"XGBoost warm-up failed, predictions will skip the model boost: {e}")
+
+
+def _read_knowledge_base() -> Tuple[Dict[str, Dict[str, Any]], _SymptomMatcher, _KnowledgeBaseArrays]:
+    """
+    Load veterinary_knowledge.json as disease -> entry, plus the matcher
+    over its symptom phrases and the array view used for scoring. Each
+    entry also carries 'symptoms_lower' (normalized strings) and
+    'symptom_ids' (int32 matcher phrase ids).
+    """
+    kb, phrases = _load_or_build_kb()
+    return kb, _SymptomMatcher(phrases), _KnowledgeBaseArrays(kb)
+
+
+def _load_or_build_kb() -> Tuple[Dict[str, Dict[str, Any]], List[str]]:
+    """
+    Return (kb, phrases) from the pickled cache when it is newer than
+    veterinary_knowledge.json, otherwise parse the JSON and refresh the
+    cache. A cache that can't be read or written is simply skipped.
+    """
+    try:
+        if os.path.getmtime(KB_CACHE_PATH) >= os.path.getmtime(KB_PATH):
+            with open(KB_CACHE_PATH, 'rb') as f:
+                cached = pickle.load(f)
+            if cached.get('version') == KB_CACHE_VERSION:
+                return cached['kb'], cached['phrases']
+    except Exception:
+        pass
+
+    with open(KB_PATH, 'r') as f:
+        kb_list = json.load(f)
+
+    phrase_ids: Dict[str, int] = {}
+    kb = {}
+    for entry in kb_list:
+        symptoms_lower = tuple(s.lower().strip() for s in entry['typical_symptoms'])
+        kb[entry['disease']] = {
+            'symptoms': entry['typical_symptoms'],
+            'symptoms_lower': symptoms_lower,
+            'symptom_ids': np.array(
+                [phrase_ids.setdefault(s, len(phrase_ids)) for s in symptoms_lower],
+                dtype=np.int32
+            ),
+            'species': entry['species']
+        }
+    phrases = list(phrase_ids)
+
+    try:
+        tmp_path = f"{KB_CACHE_PATH}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(
+                {'version': KB_CACHE_VERSION, 'kb': kb, 'phrases': phrases},
+                f, protocol=pickle.HIGHEST_PROTOCOL
+            )
+        os.replace(tmp_path, KB_CACHE_PATH)
+    except OSError as e:
+        print(f"WARNING: Could not write knowledge base cache: {e}")
+
+    return kb, phrases
+
+
+def _match_symptoms(
+    disease_symptoms: List[str],
+    symptom_mask: np.ndarray
+) -> Tuple[List[str], List[str]]:
+    """Split a disease's symptoms into (matched, verification) by its hit mask."""
+    matched = list(compress(disease_symptoms, symptom_mask))
+    verification = list(compress(disease_symptoms, ~symptom_mask))
+    return matched, verification
+
+
+def _load_compiled_predictor():
+    """Load the Treelite-compiled model (convert_model_treelite.py) if present."""
+    if not os.path.exists(COMPILED_MODEL_PATH):
+        return None
+    try:
+        import tl2cgen
+        predictor = tl2cgen.Predictor(COMPILED_MODEL_PATH)
+        print("SUCCESS: Using compiled XGBoost predictor")
+        return predictor
+    except Exception as e:
+        print(f"WARNING: Compiled predictor unavailable, using XGBoost: {e}")
+        return None
+
+
+def _load_onnx_predictor():
+    """Load the ONNX export (convert_prediction_model_onnx.py) if present. Returns predict_fn."""
+    if not os.path.exists(ONNX_MODEL_PATH):
+        return None
+    try:
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        # Rows arrive one (or a small batch) at a time; extra threads only
+        # add synchronization cost at this size
+        options.intra_op_num_threads = 1
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        session = ort.InferenceSession(
+            ONNX_MODEL_PATH, sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        input_name = session.get_inputs()[0].name
+        output_names = ['probabilities']
+
+        def predict(x: np.ndarray) -> np.ndarray:
+            return session.run(output_names, {input_name: x})[0]
+
+        print("SUCCESS: Using ONNX XGBoost predictor")
+        return predict
+    except Exception as e:
+        print(f"WARNING: ONNX predictor unavailable, using XGBoost: {e}")
+        return None
+
+
+def _predict_proba(x: np.ndarray) -> np.ndarray:
+    """Class probabilities (n_rows, n_classes) for dense float32 rows."""
+    if _compiled_predictor is not None:
+        import tl2cgen
+        # NaN marks missing features, matching XGBoost's handling of the row
+        out = _compiled_predictor.predict(tl2cgen.DMatrix(x, missing=np.nan))
+        return np.asarray(out).reshape(x.shape[0], -1)
+    if _onnx_predict is not None:
+        return _onnx_predict(x)
+    if _booster is not None:
+        # Skips the sklearn wrapper's input validation and DMatrix setup;
+        # the float32 NaN row is consumed in place
+        return _booster.inplace_predict(
+            x, iteration_range=_iteration_range, missing=np.nan, validate_features=False
+        )
+    return _model.predict_proba(x)
+
+
+# XGBoost gets a single worker; batching, not thread fan-out, is what
+# amortizes its per-call overhead.
+PREDICT_POOL = ThreadPoolExecutor(max_workers=1, thread_name_prefix="vetai-predict")
+
+
+prediction_batcher = MicroBatcher(
+    _predict_proba,
+    PREDICT_POOL,
+    settings.PREDICTION_BATCH_MAX_SIZE,
+    settings.PREDICTION_BATCH_MAX_WAIT_MS
+)
+
+
+def _model_species(species: str) -> str:
+    """App species name -> the model's / knowledge base's species name."""
+    return SPECIES_MAP.get(species.lower()) or species.title()
+
+
 def _encode_species(species: str) -> int:
     """Encode species string to integer. Returns 0 if unknown."""
-    # Map from app's species names to model's expected names
-    species_map = {
-        'dog': 'Dog', 'cat': 'Cat', 'horse': 'Horse', 'cow': 'Cow',
-        'pig': 'Pig', 'rabbit': 'Rabbit', 'goat': 'Goat', 'sheep': 'Sheep'
-    }
-    mapped = species_map.get(species.lower(), species.title())
-    try:
-        return int(_animal_encoder.transform([mapped])[0])
-    except (ValueError, KeyError):
-        return 0
+    return _animal_index.get(_model_species(species), 0)
 
 
 def _encode_breed(breed: str) -> int:
     """Encode breed string to integer. Returns 0 if unknown."""
     if not breed:
         return 0
-    try:
-        return int(_breed_encoder.transform([breed])[0])
-    except (ValueError, KeyError):
+    code = _breed_index.get(breed)
+    if code is None:
         # Try title case
-        try:
-            return int(_breed_encoder.transform([breed.title()])[0])
-        except (ValueError, KeyError):
-            return 0
+        code = _breed_index.get(breed.title(), 0)
+    return code
 
 
 def _compute_vitals(
@@ -106,8 +565,11 @@ def _compute_vitals(
     symptoms: List[str]
 ) -> np.ndarray:
     """
-    Compute the 6 vitals features expected by the scaler:
+    Compute the 6 scaled vitals features:
     [Fever_Signal, HR_Signal, Severity_Idx, Duration_Days, Weight, Age]
+
+    Standardization is done inline as (raw - mean) * inv_scale; for one
+    row, sklearn's transform() validation costs far more than the math.
     """
     # Fever_Signal: deviation from normal (around 38.5°C for most animals)
     fever_signal = (temperature - 38.5) if temperature else 0.0
@@ -121,8 +583,145 @@ def _compute_vitals(
     # Duration_Days
     dur = float(duration_days) if duration_days else 3.0
 
-    raw = np.array([[fever_signal, hr_signal, severity_idx, dur, weight_kg, float(age_months)]])
-    return _vitals_scaler.transform(raw)
+    # Scaled in place: one 6-element array per call, no temporaries
+    vitals = np.array([fever_signal, hr_signal, severity_idx, dur, weight_kg, float(age_months)])
+    vitals -= _vitals_mean
+    vitals *= _vitals_inv_scale
+    return vitals
+
+
+def _symptom_term_ids(symptom: str) -> Tuple[int, ...]:
+    """TF-IDF vocabulary ids present in one symptom string (cached)."""
+    ids = _symptom_term_cache.get(symptom)
+    if ids is None:
+        vocabulary = _symptom_vectorizer.vocabulary_
+        ids = tuple({vocabulary[t] for t in _symptom_analyzer(symptom) if t in vocabulary})
+        if len(_symptom_term_cache) < _SYMPTOM_TERM_CACHE_MAX:
+            _symptom_term_cache[symptom] = ids
+    return ids
+
+
+def _symptom_tfidf(symptoms: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (indices, values) of the TF-IDF row for the symptom list — same values
+    as _symptom_vectorizer.transform([', '.join(symptoms)]).
+    """
+    if _symptom_analyzer is None:
+        row = _symptom_vectorizer.transform([', '.join(symptoms)])
+        return row.indices, row.data
+
+    ids = set()
+    for s in symptoms:
+        ids.update(_symptom_term_ids(s))
+    indices = np.fromiter(sorted(ids), dtype=np.intp, count=len(ids))
+    values = _symptom_idf[indices]
+
+    norm = _symptom_vectorizer.norm
+    if norm == 'l2':
+        total = np.sqrt(np.dot(values, values))
+    elif norm == 'l1':
+        total = np.abs(values).sum()
+    else:
+        total = 0.0
+    if total > 0:
+        values = values / total
+    return indices, values
+
+
+def _build_feature_vector(
+    species: str,
+    breed: Optional[str],
+    symptoms: List[str],
+    vitals_scaled: np.ndarray
+) -> np.ndarray:
+    """
+    Assemble the (1, n_features) model input directly in a dense row:
+    [species, breed | TF-IDF symptom terms | symptom count | 6 vitals].
+
+    The model was fed sparse rows, where XGBoost treats unstored entries
+    as missing rather than 0 — so the row starts as NaN and any zero
+    written into it is turned back into NaN to keep identical predictions.
+    """
+    x = np.full((1, _n_features), np.nan, dtype=np.float32)
+    x[0, 0] = _encode_species(species)
+    x[0, 1] = _encode_breed(breed or "")
+
+    term_indices, term_values = _symptom_tfidf(symptoms)
+    x[0, 2 + term_indices] = term_values
+
+    x[0, 2 + _n_symptom_terms] = float(len(symptoms))
+    x[0, -6:] = vitals_scaled
+    x[x == 0] = np.nan
+    return x
+
+
+def _top_n_indices(scores: np.ndarray, n: int) -> np.ndarray:
+    """
+    Indices of the n largest scores in descending order, with ties kept in
+    original order — the same picks as a stable descending sort, except
+    that only the candidates at or above the n-th largest value are sorted.
+    """
+    if n <= 0 or scores.size == 0:
+        return np.empty(0, dtype=np.intp)
+    if scores.size > n:
+        kth = np.partition(scores, scores.size - n)[scores.size - n]
+        candidates = np.flatnonzero(scores >= kth)
+    else:
+        candidates = np.arange(scores.size)
+    order = np.argsort(-scores[candidates], kind='stable')
+    return candidates[order[:n]]
+
+
+def _begin_prediction(
+    species: str,
+    breed: Optional[str],
+    symptoms: List[str],
+    weight_kg: float,
+    age_months: int,
+    temperature: Optional[float],
+    heart_rate: Optional[float],
+    duration_days: Optional[int],
+    top_n: int
+) -> Tuple[Optional[List[Dict[str, Any]]], Optional[tuple]]:
+    """
+    Everything predict_diseases and predict_diseases_async do before the
+    model call. Returns (results, None) when no inference is needed — a
+    cache hit or no knowledge base — else (None, (key, kb_scores,
+    feature_vector)) for the caller to score and hand to _finish_prediction.
+    """
+    key = (species, breed, tuple(symptoms), weight_kg, age_months,
+           temperature, heart_rate, duration_days, top_n)
+    cached = _cached_result(key)
+    if cached is not None:
+        return cached, None
+
+    kb, kb_scores, feature_vector = _prepare_prediction(
+        species, breed, symptoms, weight_kg, age_months,
+        temperature, heart_rate, duration_days
+    )
+    if not kb:
+        return _unavailable_prediction(species, symptoms), None
+    return None, (key, kb_scores, feature_vector)
+
+
+def _finish_prediction(
+    key: tuple,
+    kb_scores: tuple,
+    feature_vector: Optional[np.ndarray],
+    probabilities: Optional[np.ndarray],
+    species: str,
+    symptoms: List[str],
+    top_n: int
+) -> List[Dict[str, Any]]:
+    """
+    Rank with the (optional) model probabilities and cache the results.
+    When the model was asked (feature_vector set) but failed, the KB-only
+    ranking is returned uncached so the next request retries the model.
+    """
+    results = _rank_predictions(kb_scores, probabilities, species, symptoms, top_n)
+    if feature_vector is None or probabilities is not None:
+        _store_result(key, results)
+    return results
 
 
 def predict_diseases(
@@ -150,120 +749,194 @@ def predict_diseases(
     This ensures diseases with the most matching symptoms always surface,
     regardless of what the XGBoost model predicts.
     """
+    results, pending = _begin_prediction(
+        species, breed, symptoms, weight_kg, age_months,
+        temperature, heart_rate, duration_days, top_n
+    )
+    if results is not None:
+        return results
+
+    key, kb_scores, feature_vector = pending
+    probabilities = None
+    if feature_vector is not None:
+        try:
+            probabilities = _predict_proba(feature_vector)[0]
+        except Exception as e:
+            print(f"XGBoost boost skipped: {e}")
+
+    return _finish_prediction(
+        key, kb_scores, feature_vector, probabilities, species, symptoms, top_n
+    )
+
+
+async def predict_diseases_async(
+    species: str,
+    breed: Optional[str],
+    symptoms: List[str],
+    weight_kg: float = 10.0,
+    age_months: int = 24,
+    temperature: Optional[float] = None,
+    heart_rate: Optional[float] = None,
+    duration_days: Optional[int] = None,
+    top_n: int = 3
+) -> List[Dict[str, Any]]:
+    """
+    Same as predict_diseases, but the XGBoost call is coalesced with other
+    in-flight requests by prediction_batcher and runs off the event loop.
+    """
+    results, pending = _begin_prediction(
+        species, breed, symptoms, weight_kg, age_months,
+        temperature, heart_rate, duration_days, top_n
+    )
+    if results is not None:
+        return results
+
+    key, kb_scores, feature_vector = pending
+    probabilities = None
+    if feature_vector is not None:
+        try:
+            probabilities = await prediction_batcher.infer(feature_vector)
+        except Exception as e:
+            print(f"XGBoost boost skipped: {e}")
+
+    return _finish_prediction(
+        key, kb_scores, feature_vector, probabilities, species, symptoms, top_n
+    )
+
+
+def _cached_result(key: tuple) -> Optional[List[Dict[str, Any]]]:
+    """Return a copy of the cached results for these inputs, if any."""
+    results = _result_cache.get(key)
+    if results is None:
+        return None
+    _result_cache.move_to_end(key)
+    return copy.deepcopy(results)
+
+
+def _store_result(key: tuple, results: List[Dict[str, Any]]):
+    """
+    Insert a private copy into the LRU, evicting the oldest entry when
+    full. Results computed while the model is not loaded are not cached,
+    so they don't outlive a later successful model load (a failed model
+    call is kept out by _finish_prediction).
+    """
+    max_size = settings.PREDICTION_CACHE_SIZE
+    if max_size <= 0 or _model is None:
+        return
+    _result_cache[key] = copy.deepcopy(results)
+    if len(_result_cache) > max_size:
+        _result_cache.popitem(last=False)
+
+
+def _unavailable_prediction(species: str, symptoms: List[str]) -> List[Dict[str, Any]]:
+    """Placeholder result when the knowledge base cannot be loaded."""
+    return [{
+        "disease_name": "Unable to predict - knowledge base unavailable",
+        "probability": 0.0, "confidence": "low",
+        "matched_symptoms": [], "verification_symptoms": [],
+        "all_disease_symptoms": [], "common_symptoms": symptoms,
+        "species": species, "urgency": "routine", "symptom_confidence": 0
+    }]
+
+
+def _prepare_prediction(
+    species: str,
+    breed: Optional[str],
+    symptoms: List[str],
+    weight_kg: float,
+    age_months: int,
+    temperature: Optional[float],
+    heart_rate: Optional[float],
+    duration_days: Optional[int]
+) -> Tuple[Optional[Dict[str, Any]], Optional[tuple], Optional[np.ndarray]]:
+    """
+    Knowledge-base scoring plus the model input row (None when the model
+    is unavailable or no disease matched, since the model only reweights
+    matched diseases). Returns (kb, kb_scores, feature_vector); kb is empty
+    if the knowledge base could not be loaded. kb_scores is
+    (kb_arrays, disease indices, match ratios, flat symptom hits) for the
+    diseases with at least one match.
+    """
     _load_artifacts()
 
     # --- Ensure we have a knowledge base to work with ---
-    kb = _knowledge_base
+    kb, matcher, kb_arrays = _knowledge_base, _symptom_matcher, _kb_arrays
     if not kb:
         # Try loading directly
-        kb_path = os.path.join(MODEL_DIR, 'veterinary_knowledge.json')
         try:
-            with open(kb_path, 'r') as f:
-                kb_list = json.load(f)
-            kb = {
-                entry['disease']: {
-                    'symptoms': entry['typical_symptoms'],
-                    'species': entry['species']
-                }
-                for entry in kb_list
-            }
+            kb, matcher, kb_arrays = _read_knowledge_base()
         except Exception:
             pass
 
     if not kb:
-        return [{
-            "disease_name": "Unable to predict - knowledge base unavailable",
-            "probability": 0.0, "confidence": "low",
-            "matched_symptoms": [], "verification_symptoms": [],
-            "all_disease_symptoms": [], "common_symptoms": symptoms,
-            "species": species, "urgency": "routine", "symptom_confidence": 0
-        }]
+        return kb, None, None
 
     # --- Species mapping ---
-    species_map = {
-        'dog': 'Dog', 'cat': 'Cat', 'horse': 'Horse', 'cow': 'Cow',
-        'pig': 'Pig', 'rabbit': 'Rabbit', 'goat': 'Goat', 'sheep': 'Sheep'
-    }
-    target_species = species_map.get(species.lower(), species.title())
-    input_symptoms_lower = set(s.lower().strip() for s in symptoms)
+    target_species = _model_species(species)
+    input_symptoms_lower = frozenset(s.lower().strip() for s in symptoms)
+    hit_mask = matcher.hit_mask(input_symptoms_lower)
 
     # ──────────────────────────────────────────────────────────────
     # STEP 1 — Score every disease in the knowledge base by symptom match
     # ──────────────────────────────────────────────────────────────
-    kb_scores = []   # list of (disease_name, match_ratio, matched, verification, all_symptoms)
-
-    for disease_name, info in kb.items():
-        # Filter by species
-        if info.get('species') != target_species:
-            continue
-
-        all_disease_symptoms = info.get('symptoms', [])
-        matched = []
-        verification = []
-        for ds in all_disease_symptoms:
-            ds_lower = ds.lower().strip()
-            is_matched = any(
-                ds_lower in inp or inp in ds_lower
-                for inp in input_symptoms_lower
-            )
-            if is_matched:
-                matched.append(ds)
-            else:
-                verification.append(ds)
-
-        if len(matched) > 0:
-            match_ratio = len(matched) / len(all_disease_symptoms) if all_disease_symptoms else 0.0
-            kb_scores.append((disease_name, match_ratio, matched, verification, all_disease_symptoms))
+    # Species filter and match counts for every disease at once
+    indices, counts, hits = kb_arrays.score(hit_mask, target_species)
+    ratios = counts / kb_arrays.lengths[indices]
+    kb_scores = (kb_arrays, indices, ratios, hits)
 
     # ──────────────────────────────────────────────────────────────
-    # STEP 2 — Optionally get XGBoost probabilities for blending
+    # STEP 2 — Model input row for the XGBoost probabilities
     # ──────────────────────────────────────────────────────────────
-    model_probs = {}   # disease_name -> probability
-    if _model is not None:
+    feature_vector = None
+    if _model is not None and indices.size:
         try:
-            species_encoded = _encode_species(species)
-            breed_encoded = _encode_breed(breed or "")
-            symptom_text = ', '.join(symptoms)
-            symptom_features = _symptom_vectorizer.transform([symptom_text])
             vitals_scaled = _compute_vitals(
                 temperature, heart_rate, duration_days,
                 weight_kg, age_months, symptoms
             )
-            from scipy.sparse import hstack, csr_matrix
-            cat_features = csr_matrix(np.array([[species_encoded, breed_encoded]]))
-            symptom_count = csr_matrix(np.array([[float(len(symptoms))]]))
-            feature_vector = hstack([cat_features, symptom_features, symptom_count, csr_matrix(vitals_scaled)])
-
-            probabilities = _model.predict_proba(feature_vector)[0]
-            for i, prob in enumerate(probabilities):
-                try:
-                    dname = _disease_encoder.inverse_transform([i])[0]
-                    model_probs[dname] = float(prob)
-                except Exception:
-                    pass
+            feature_vector = _build_feature_vector(species, breed, symptoms, vitals_scaled)
         except Exception as e:
             print(f"XGBoost boost skipped: {e}")
 
+    return kb, kb_scores, feature_vector
+
+
+def _rank_predictions(
+    kb_scores: tuple,
+    probabilities: Optional[np.ndarray],
+    species: str,
+    symptoms: List[str],
+    top_n: int
+) -> List[Dict[str, Any]]:
+    """Blend KB match ratios with model probabilities into top-N result dicts."""
     # ──────────────────────────────────────────────────────────────
     # STEP 3 — Combine scores: KB match (80%) + model probability (20%)
     # ──────────────────────────────────────────────────────────────
     KB_WEIGHT = 0.80
     MODEL_WEIGHT = 0.20
 
-    combined = []
-    for disease_name, match_ratio, matched, verification, all_syms in kb_scores:
-        model_prob = model_probs.get(disease_name, 0.0)
-        combined_score = (match_ratio * KB_WEIGHT) + (model_prob * MODEL_WEIGHT)
-        combined.append((disease_name, combined_score, match_ratio, matched, verification, all_syms))
+    kb_arrays, indices, ratios, hits = kb_scores
+    # Each matched disease's model probability, 0 for diseases the model lacks
+    model_probs = np.zeros(len(indices))
+    if probabilities is not None:
+        columns = kb_arrays.class_rows(_disease_classes)[indices]
+        known = columns >= 0
+        model_probs[known] = probabilities[columns[known]]
+    combined = (ratios * KB_WEIGHT) + (model_probs * MODEL_WEIGHT)
 
-    # Sort by combined score descending
-    combined.sort(key=lambda x: x[1], reverse=True)
+    # Pick the top N by combined score (descending, ties in KB order)
+    top_indices = _top_n_indices(combined, top_n)
 
     # ──────────────────────────────────────────────────────────────
     # STEP 4 — Build top-N result dicts
     # ──────────────────────────────────────────────────────────────
     results = []
-    for disease_name, combined_score, match_ratio, matched, verification, all_syms in combined[:top_n]:
+    for j in top_indices.tolist():
+        i = int(indices[j])
+        disease_name, kb_entry = kb_arrays.names[i], kb_arrays.entries[i]
+        combined_score, match_ratio = float(combined[j]), float(ratios[j])
+        all_syms = kb_entry.get('symptoms', [])
+        matched, verification = _match_symptoms(all_syms, kb_arrays.symptom_mask(hits, i))
         max_symptoms = len(all_syms) if all_syms else 8
         symptom_confidence = round((len(matched) / max_symptoms) * 100) if max_symptoms > 0 else 0
 
@@ -282,19 +955,18 @@ def predict_diseases(
         else:
             urgency = "routine"
 
-        kb_entry = kb.get(disease_name, {})
-        results.append({
-            "disease_name": disease_name,
-            "probability": max(0.0, min(1.0, round(combined_score, 4))),
-            "confidence": confidence,
-            "matched_symptoms": matched,
-            "verification_symptoms": verification,
-            "all_disease_symptoms": all_syms,
-            "common_symptoms": all_syms,
-            "species": kb_entry.get('species', species),
-            "urgency": urgency,
-            "symptom_confidence": symptom_confidence
-        })
+        result = _RESULT_TEMPLATE.copy()
+        result["disease_name"] = disease_name
+        result["probability"] = max(0.0, min(1.0, round(combined_score, 4)))
+        result["confidence"] = confidence
+        result["matched_symptoms"] = matched
+        result["verification_symptoms"] = verification
+        result["all_disease_symptoms"] = all_syms
+        result["common_symptoms"] = all_syms
+        result["species"] = kb_entry.get('species', species)
+        result["urgency"] = urgency
+        result["symptom_confidence"] = symptom_confidence
+        results.append(result)
 
     # Normalize confidence scores relative to Top N
     total_prob = sum(r["probability"] for r in results)
@@ -305,8 +977,12 @@ def predict_diseases(
         for r in results:
             r["normalized_confidence"] = round(1.0 / len(results), 4) if results else 0.0
 
-    # If no KB matches at all, fall back
+    # If no KB matches at all, fall back. The fallback would rescan the
+    # same knowledge base with the same matcher, so a scan that matched
+    # nothing goes straight to its "no match" answer.
     if not results:
+        if indices.size == 0:
+            return _no_match_prediction(species, symptoms)
         return _fallback_prediction(species, symptoms)
 
     return results
@@ -345,7 +1021,12 @@ def refine_predictions(
 
     Returns updated predictions sorted by refined_score descending.
     """
-    selected_lower = set(s.lower().strip() for s in selected_symptoms)
+    selected_lower = frozenset(s.lower().strip() for s in selected_symptoms)
+    # Predictions normally come from the knowledge base, so their symptoms
+    # resolve to matcher ids hit once for the whole selection
+    kb = _knowledge_base or {}
+    matcher = _symptom_matcher or _SymptomMatcher([])
+    hit_ids = matcher.hits(selected_lower)
     refined = []
 
     for pred in predictions[:3]:
@@ -354,17 +1035,23 @@ def refine_predictions(
         all_disease_symptoms = pred_copy.get("all_disease_symptoms", [])
         initial_matched = pred_copy.get("matched_symptoms", [])
         initial_count = len(initial_matched)
+        initial_matched_set = set(initial_matched)
 
         # Count newly matched symptoms from doctor selection
-        new_matches = []
-        for ds in all_disease_symptoms:
-            ds_lower = ds.lower().strip()
-            if ds_lower in selected_lower or any(
-                ds_lower in sel or sel in ds_lower for sel in selected_lower
-            ):
-                # Only count if not already in initial matched
-                if ds not in initial_matched:
-                    new_matches.append(ds)
+        # (only if not already in initial matched). Symptoms straight from
+        # the knowledge base reuse its phrase ids instead of re-normalizing.
+        kb_entry = kb.get(pred_copy.get("disease_name"))
+        if kb_entry is not None and kb_entry['symptoms'] == all_disease_symptoms:
+            new_matches = [
+                ds for ds, phrase_id in zip(all_disease_symptoms, kb_entry['symptom_ids'].tolist())
+                if ds not in initial_matched_set and phrase_id in hit_ids
+            ]
+        else:
+            new_matches = [
+                ds for ds in all_disease_symptoms
+                if ds not in initial_matched_set
+                and matcher.matches(ds.lower().strip(), hit_ids, selected_lower)
+            ]
 
         total_matched = initial_count + len(new_matches)
         confidence_pct = pred_copy.get("probability", 0) * 100
@@ -379,9 +1066,10 @@ def refine_predictions(
 
         # Update the matched/verification lists
         all_matched = list(initial_matched) + new_matches
+        all_matched_set = initial_matched_set.union(new_matches)
         pred_copy["matched_symptoms"] = all_matched
         pred_copy["verification_symptoms"] = [
-            s for s in all_disease_symptoms if s not in all_matched
+            s for s in all_disease_symptoms if s not in all_matched_set
         ]
 
         refined.append(pred_copy)
@@ -393,12 +1081,11 @@ def refine_predictions(
 
 def _fallback_prediction(species: str, symptoms: List[str]) -> List[Dict[str, Any]]:
     """Fallback using knowledge base matching when model fails to load."""
-    if not _knowledge_base:
+    kb, matcher, kb_arrays = _knowledge_base, _symptom_matcher, _kb_arrays
+    if not kb:
         # Load knowledge base directly
-        kb_path = os.path.join(MODEL_DIR, 'veterinary_knowledge.json')
         try:
-            with open(kb_path, 'r') as f:
-                kb_list = json.load(f)
+            kb, matcher, kb_arrays = _read_knowledge_base()
         except Exception:
             return [{
                 "disease_name": "Unable to predict - model unavailable",
@@ -412,58 +1099,44 @@ def _fallback_prediction(species: str, symptoms: List[str]) -> List[Dict[str, An
                 "urgency": "routine",
                 "symptom_confidence": 0
             }]
-    else:
-        kb_list = [
-            {"disease": d, "typical_symptoms": v["symptoms"], "species": v["species"]}
-            for d, v in _knowledge_base.items()
-        ]
 
     # Species mapping for matching
-    species_map = {
-        'dog': 'Dog', 'cat': 'Cat', 'horse': 'Horse', 'cow': 'Cow',
-        'pig': 'Pig', 'rabbit': 'Rabbit', 'goat': 'Goat', 'sheep': 'Sheep'
-    }
-    target_species = species_map.get(species.lower(), species.title())
+    target_species = _model_species(species)
 
-    input_symptoms_lower = set(s.lower().strip() for s in symptoms)
-    scored = []
+    input_symptoms_lower = frozenset(s.lower().strip() for s in symptoms)
+    hit_mask = matcher.hit_mask(input_symptoms_lower)
 
-    for entry in kb_list:
-        # Optionally filter by species
-        if entry['species'] != target_species:
-            continue
-
-        disease_symptoms = entry['typical_symptoms']
-        matched = []
-        verification = []
-        for ds in disease_symptoms:
-            ds_lower = ds.lower().strip()
-            is_matched = any(
-                ds_lower in inp or inp in ds_lower
-                for inp in input_symptoms_lower
-            )
-            if is_matched:
-                matched.append(ds)
-            else:
-                verification.append(ds)
-
-        if len(matched) > 0:
-            prob = len(matched) / len(disease_symptoms)
-            scored.append({
-                "disease_name": entry['disease'],
-                "probability": round(prob, 4),
-                "confidence": "high" if prob >= 0.6 else ("medium" if prob >= 0.3 else "low"),
-                "matched_symptoms": matched,
-                "verification_symptoms": verification,
-                "all_disease_symptoms": disease_symptoms,
-                "common_symptoms": disease_symptoms,
-                "species": entry['species'],
-                "urgency": "urgent" if prob >= 0.7 else ("soon" if prob >= 0.4 else "routine"),
-                "symptom_confidence": round((len(matched) / (len(disease_symptoms) or 8)) * 100)
-            })
-
-    scored.sort(key=lambda x: x['probability'], reverse=True)
-    return scored[:3] if scored else [{
+    # Species filter and match ratios for every disease at once
+    indices, counts, hits = kb_arrays.score(hit_mask, target_species)
+    probs = (counts / kb_arrays.lengths[indices]).tolist()
+    rounded = [round(prob, 4) for prob in probs]
+
+    # Only the top 3 need their symptom lists materialized
+    results = []
+    for j in _top_n_indices(np.array(rounded), 3).tolist():
+        i, prob, rounded_prob = int(indices[j]), probs[j], rounded[j]
+        disease_name, entry = kb_arrays.names[i], kb_arrays.entries[i]
+        disease_symptoms = entry['symptoms']
+        matched, verification = _match_symptoms(disease_symptoms, kb_arrays.symptom_mask(hits, i))
+        result = _RESULT_TEMPLATE.copy()
+        result["disease_name"] = disease_name
+        result["probability"] = rounded_prob
+        result["confidence"] = "high" if prob >= 0.6 else ("medium" if prob >= 0.3 else "low")
+        result["matched_symptoms"] = matched
+        result["verification_symptoms"] = verification
+        result["all_disease_symptoms"] = disease_symptoms
+        result["common_symptoms"] = disease_symptoms
+        result["species"] = entry['species']
+        result["urgency"] = "urgent" if prob >= 0.7 else ("soon" if prob >= 0.4 else "routine")
+        result["symptom_confidence"] = round((len(matched) / (len(disease_symptoms) or 8)) * 100)
+        results.append(result)
+
+    return results if results else _no_match_prediction(species, symptoms)
+
+
+def _no_match_prediction(species: str, symptoms: List[str]) -> List[Dict[str, Any]]:
+    """Placeholder result when no knowledge-base disease matches any symptom."""
+    return [{
         "disease_name": "No matching diseases found",
         "probability": 0.0,
         "confidence": "low",
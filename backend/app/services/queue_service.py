@@ -2,9 +2,11 @@
 Queue and token management service.
 """
 
+import asyncio
 from datetime import datetime, timedelta
 from typing import Optional, List
 from bson import ObjectId
+from pymongo import ReturnDocument
 
 from ..config import get_settings
 from ..database import Database
@@ -19,14 +21,41 @@ class QueueService:
     @classmethod
     async def _get_next_token_number(cls) -> str:
         """Generate next sequential token number (date-stamped to avoid collisions)."""
-        tokens = Database.get_collection("tokens")
+        counters = Database.get_collection("counters")
         
         today = datetime.utcnow()
         date_str = today.strftime("%Y%m%d")
-        today_start = today.replace(hour=0, minute=0, second=0, microsecond=0)
-        
-        # Find today's highest token number to derive next sequence
         prefix = f"{settings.TOKEN_PREFIX}-{date_str}-"
+        counter_id = f"tokens:{date_str}"
+        
+        if await counters.find_one({"_id": counter_id}, {"_id": 1}) is None:
+            # Seed today's counter past any tokens issued before counters
+            # existed. $max is idempotent, so concurrent first requests can
+            # all seed safely before anyone increments.
+            last_seq = await cls._get_last_issued_sequence(prefix)
+            await counters.update_one(
+                {"_id": counter_id},
+                {"$max": {"seq": last_seq}},
+                upsert=True
+            )
+        
+        # Atomically take the next sequence from today's counter document
+        counter = await counters.find_one_and_update(
+            {"_id": counter_id},
+            {"$inc": {"seq": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        seq = counter["seq"]
+        
+        # Format: VET-20260210-001, VET-20260210-002, etc.
+        return f"{prefix}{seq:03d}"
+    
+    @classmethod
+    async def _get_last_issued_sequence(cls, prefix: str) -> int:
+        """Highest sequence among existing tokens with this prefix (0 if none)."""
+        tokens = Database.get_collection("tokens")
+        
         latest = await tokens.find_one(
             {"token_number": {"$regex": f"^{prefix}"}},
             sort=[("token_number", -1)]
@@ -34,14 +63,10 @@ class QueueService:
         
         if latest:
             try:
-                last_seq = int(latest["token_number"].split("-")[-1])
+                return int(latest["token_number"].split("-")[-1])
             except (ValueError, IndexError):
-                last_seq = 0
-        else:
-            last_seq = 0
-        
-        # Format: VET-20260210-001, VET-20260210-002, etc.
-        return f"{prefix}{last_seq + 1:03d}"
+                return 0
+        return 0
     
     @classmethod
     async def issue_token(
@@ -110,44 +135,48 @@ class QueueService:
         # Get today's start
         today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
         
-        # Get waiting tokens (sorted by priority desc, then by time)
+        # The three queries are independent; run them concurrently
         waiting_cursor = tokens.find({
             "status": QueueStatus.WAITING.value,
             "issued_at": {"$gte": today}
         }).sort([("priority", -1), ("issued_at", 1)])
         
-        waiting_tokens = []
-        async for token in waiting_cursor:
-            token["_id"] = str(token["_id"])
-            waiting_tokens.append(QueueToken(**token))
-        
-        # Get in-progress tokens
         in_progress_cursor = tokens.find({
             "status": {"$in": [QueueStatus.CALLED.value, QueueStatus.IN_PROGRESS.value]},
             "issued_at": {"$gte": today}
         }).sort("called_at", 1)
         
-        in_progress_tokens = []
-        async for token in in_progress_cursor:
-            token["_id"] = str(token["_id"])
-            in_progress_tokens.append(QueueToken(**token))
-        
-        # Calculate average wait time
-        avg_wait = None
-        completed_cursor = tokens.find({
-            "status": QueueStatus.COMPLETED.value,
-            "issued_at": {"$gte": today},
-            "called_at": {"$ne": None}
-        })
-        
-        wait_times = []
-        async for token in completed_cursor:
-            if token.get("called_at") and token.get("issued_at"):
-                wait = (token["called_at"] - token["issued_at"]).total_seconds() / 60
-                wait_times.append(wait)
+        # Average wait time (minutes) of today's completed tokens, server-side
+        avg_cursor = tokens.aggregate([
+            {"$match": {
+                "status": QueueStatus.COMPLETED.value,
+                "issued_at": {"$gte": today},
+                "called_at": {"$ne": None}
+            }},
+            {"$group": {
+                "_id": None,
+                "avg_wait": {"$avg": {
+                    "$divide": [{"$subtract": ["$called_at", "$issued_at"]}, 60000]
+                }}
+            }}
+        ])
+        
+        waiting_raw, in_progress_raw, avg_docs = await asyncio.gather(
+            waiting_cursor.to_list(length=None),
+            in_progress_cursor.to_list(length=None),
+            avg_cursor.to_list(length=1)
+        )
         
-        if wait_times:
-            avg_wait = sum(wait_times) / len(wait_times)
+        # Waiting tokens (sorted by priority desc, then by time)
+        waiting_tokens = [
+            QueueToken(**{**token, "_id": str(token["_id"])})
+            for token in waiting_raw
+        ]
+        in_progress_tokens = [
+            QueueToken(**{**token, "_id": str(token["_id"])})
+            for token in in_progress_raw
+        ]
+        avg_wait = avg_docs[0]["avg_wait"] if avg_docs else None
         
         return QueueDisplay(
             waiting=waiting_tokens,
@@ -262,9 +291,7 @@ class QueueService:
             "status": {"$in": [QueueStatus.CALLED.value, QueueStatus.IN_PROGRESS.value]}
         }).sort("called_at", -1)
         
-        result = []
-        async for token in cursor:
-            token["_id"] = str(token["_id"])
-            result.append(QueueToken(**token))
-        
-        return result
+        return [
+            QueueToken(**{**token, "_id": str(token["_id"])})
+            for token in await cursor.to_list(length=None)
+        ]
@@ -1,19 +1,46 @@
 """
 Voice transcription service using OpenAI Whisper.
-Provides local speech-to-text for clinical voice notes.
+Provides local speech-to-text for clinical voice notes; uses the
+faster-whisper (CTranslate2) runtime instead when it is installed.
 """
 
 import os
 import uuid
+import hashlib
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from datetime import datetime
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple, BinaryIO, Union
 from pathlib import Path
 
+import numpy as np
+
+from ..config import get_settings
+
+settings = get_settings()
+
 # Whisper model will be lazy loaded
 _whisper_model = None
+_whisper_backend = None    # "faster-whisper" or "openai-whisper"
+_whisper_device = "cpu"
+_WHISPER_LOAD_LOCK = threading.Lock()
+
+# Whisper is CPU-bound and already multi-threaded internally; one worker
+# keeps it off the event loop without transcriptions fighting for cores.
+WHISPER_POOL = ThreadPoolExecutor(max_workers=1, thread_name_prefix="vetai-whisper")
 
-# Common veterinary symptoms for extraction
-SYMPTOM_KEYWORDS = [
+# Whisper's input format: mono float32 at 16 kHz
+WHISPER_SAMPLE_RATE = 16000
+
+# Waveforms whose loudest 30 ms frame stays below this RMS (about -60 dBFS)
+# are silent; Whisper is not run on them.
+SILENCE_RMS_THRESHOLD = 1e-3
+SILENCE_FRAME_SAMPLES = WHISPER_SAMPLE_RATE * 30 // 1000
+
+# Common veterinary symptoms for extraction (only ever iterated)
+SYMPTOM_KEYWORDS = (
     # General symptoms
     "vomiting", "diarrhea", "lethargy", "fever", "loss of appetite", "weight loss",
     "coughing", "sneezing", "nasal discharge", "eye discharge", "limping",
@@ -35,101 +62,317 @@ SYMPTOM_KEYWORDS = [
     "aggression", "hiding", "restlessness", "pacing", "circling",
     # Mobility
     "stiffness", "difficulty standing", "dragging legs", "reluctant to move"
-]
+)
 
+# Common phrases and the symptom they describe
+PHRASE_MAPPINGS = {
+    "throwing up": "vomiting",
+    "threw up": "vomiting",
+    "not eating": "loss of appetite",
+    "won't eat": "loss of appetite",
+    "runny nose": "nasal discharge",
+    "runny eyes": "eye discharge",
+    "can't walk": "difficulty standing",
+    "trouble breathing": "breathing difficulty",
+    "losing weight": "weight loss",
+    "gained weight": "weight gain",
+    "drinking a lot": "drinking more",
+    "peeing a lot": "frequent urination",
+    "scratching a lot": "itching",
+    "losing hair": "hair loss",
+    "red skin": "redness",
+    "hot to touch": "fever"
+}
 
-def _load_whisper_model(model_size: str = "base"):
-    """Lazy load Whisper model to avoid startup delay."""
-    global _whisper_model
+
+def _build_symptom_automaton():
+    """
+    Aho-Corasick automaton over every keyword and phrase, so a transcript
+    is matched in one pass. Each key maps to the symptoms it reports (a
+    key can be both a keyword and a phrase). None without pyahocorasick.
+    """
+    try:
+        import ahocorasick
+    except ImportError:
+        return None
+
+    reported: Dict[str, set] = {}
+    for symptom in SYMPTOM_KEYWORDS:
+        reported.setdefault(symptom, set()).add(symptom)
+    for phrase, symptom in PHRASE_MAPPINGS.items():
+        reported.setdefault(phrase, set()).add(symptom)
+
+    automaton = ahocorasick.Automaton()
+    for key, symptoms in reported.items():
+        automaton.add_word(key, tuple(symptoms))
+    automaton.make_automaton()
+    return automaton
+
+
+_symptom_automaton = _build_symptom_automaton()
+
+
+def _load_whisper_model(model_size: Optional[str] = None, device: Optional[str] = None):
+    """
+    Lazy load Whisper model (settings.WHISPER_MODEL by default) to avoid
+    startup delay. device overrides settings.WHISPER_DEVICE.
+    """
+    global _whisper_model, _whisper_backend, _whisper_device
     if _whisper_model is None:
+        model_size = model_size or settings.WHISPER_MODEL
+        # Concurrent first requests must not each load their own copy
+        with _WHISPER_LOAD_LOCK:
+            if _whisper_model is None:
+                try:
+                    print(f"Loading Whisper model ({model_size})...")
+                    model, backend, device = _create_whisper_model(model_size, device)
+                    _whisper_backend, _whisper_device = backend, device
+                    _whisper_model = model
+                    print(f"Whisper model loaded successfully ({backend}, {device})")
+                except Exception as e:
+                    print(f"Failed to load Whisper: {e}")
+                    _whisper_model = "unavailable"
+    return _whisper_model if _whisper_model != "unavailable" else None
+
+
+def warm_up_whisper_model():
+    """
+    Load Whisper at startup so the first voice note doesn't wait for it.
+    On CUDA, also transcribe one second of low noise (silence would be
+    skipped by the silence gate) so kernel selection and allocations
+    happen now rather than on the first real request.
+    """
+    global _whisper_model
+    model = _load_whisper_model()
+    if model is not None and _whisper_device == "cuda":
+        noise = np.random.default_rng(0).normal(0.0, 0.01, WHISPER_SAMPLE_RATE)
         try:
-            import whisper
-            print(f"Loading Whisper model ({model_size})...")
-            _whisper_model = whisper.load_model(model_size)
-            print("Whisper model loaded successfully")
+            _run_whisper(model, noise.astype(np.float32), "en")
         except Exception as e:
-            print(f"Failed to load Whisper: {e}")
-            _whisper_model = "unavailable"
-    return _whisper_model if _whisper_model != "unavailable" else None
+            # A GPU is visible but its runtime (e.g. cuDNN) is not usable;
+            # serve transcriptions from the CPU rather than failing startup
+            print(f"Whisper CUDA warm-up failed, reloading on CPU: {e}")
+            with _WHISPER_LOAD_LOCK:
+                _whisper_model = None
+            _load_whisper_model(device="cpu")
+
+
+def _create_whisper_model(model_size: str, device: Optional[str] = None):
+    """
+    faster-whisper (CTranslate2, int8 weights) when installed, otherwise
+    openai-whisper, on device or settings.WHISPER_DEVICE ("auto" picks
+    CUDA when a GPU is visible). Returns (model, backend name, device).
+    """
+    requested = (device or settings.WHISPER_DEVICE).lower()
+    try:
+        from faster_whisper import WhisperModel
+        import ctranslate2
+    except ImportError:
+        import whisper
+        import torch
+        device = requested if requested != "auto" else (
+            "cuda" if torch.cuda.is_available() else "cpu"
+        )
+        return whisper.load_model(model_size, device=device), "openai-whisper", device
+
+    device = requested if requested != "auto" else (
+        "cuda" if ctranslate2.get_cuda_device_count() > 0 else "cpu"
+    )
+    compute_type = "int8_float16" if device == "cuda" else "int8"
+    return WhisperModel(model_size, device=device, compute_type=compute_type), "faster-whisper", device
+
+
+def _inspect_audio(audio_path: str) -> Tuple[Optional[float], Optional[str]]:
+    """
+    (duration in seconds, pre-decoded waveform path) for a saved upload,
+    read from the container header via soundfile. (None, None) when the
+    format isn't readable or soundfile isn't installed.
+    """
+    try:
+        import soundfile as sf
+        info = sf.info(audio_path)
+    except Exception:
+        return None, None
+    return info.duration, _decode_waveform(audio_path, info)
+
+
+def _decode_waveform(audio_path: str, info) -> Optional[str]:
+    """
+    Store the Whisper input waveform next to an upload that is already
+    16 kHz mono 16-bit PCM (as .npy), so transcription loads it directly
+    instead of spawning FFmpeg to decode the file. The samples are scaled
+    exactly as Whisper's FFmpeg loader does (int16 / 32768). Returns the
+    .npy path, or None when the file needs resampling/downmixing.
+    """
+    if (info.samplerate != WHISPER_SAMPLE_RATE or info.channels != 1
+            or info.subtype != 'PCM_16'):
+        return None
+    try:
+        import soundfile as sf
+        samples, _ = sf.read(audio_path, dtype='int16')
+        waveform_path = f"{audio_path}.npy"
+        np.save(waveform_path, samples.astype(np.float32) / 32768.0)
+        return waveform_path
+    except Exception:
+        return None
+
+
+def _is_silent(waveform: np.ndarray) -> bool:
+    """True when no 30 ms frame of the waveform rises above SILENCE_RMS_THRESHOLD."""
+    n_frames = len(waveform) // SILENCE_FRAME_SAMPLES
+    if n_frames == 0:
+        frames = waveform.reshape(1, -1)
+    else:
+        frames = waveform[:n_frames * SILENCE_FRAME_SAMPLES].reshape(n_frames, -1)
+    if frames.size == 0:
+        return True
+    frame_rms = np.sqrt(np.mean(np.square(frames, dtype=np.float64), axis=1))
+    return bool(frame_rms.max() < SILENCE_RMS_THRESHOLD)
+
+
+def _run_whisper(
+    model, audio_path: Union[str, np.ndarray], language: str, waveform_path: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Transcribe with whichever backend is loaded; returns {'text', 'language'}.
+    audio_path may also be a 16 kHz float32 waveform.
+    """
+    audio = np.load(waveform_path) if waveform_path else audio_path
+    if isinstance(audio, np.ndarray) and _is_silent(audio):
+        return {"text": "", "language": language}
+
+    if _whisper_backend == "faster-whisper":
+        # Greedy decoding, like openai-whisper's transcribe() default
+        segments, info = model.transcribe(audio, language=language, beam_size=1)
+        text = "".join(segment.text for segment in segments)
+        return {"text": text, "language": info.language}
+
+    return model.transcribe(
+        audio,
+        language=language,
+        fp16=(_whisper_device == "cuda")  # FP32 on CPU, which has no fast FP16
+    )
 
 
 class VoiceService:
     """Voice transcription and symptom extraction service."""
     
+    __slots__ = ("upload_dir", "_created_dirs")
+    
     UPLOAD_DIR = Path("uploads/audio")
     ALLOWED_EXTENSIONS = {'.wav', '.mp3', '.m4a', '.ogg', '.webm', '.flac'}
     MAX_FILE_SIZE = 25 * 1024 * 1024  # 25MB
+    CHUNK_SIZE = 64 * 1024
     
     def __init__(self):
         self.upload_dir = self.UPLOAD_DIR
         self.upload_dir.mkdir(parents=True, exist_ok=True)
+        # Date folders already created by this process
+        self._created_dirs = set()
     
-    async def save_audio(
-        self, 
-        file_content: bytes, 
-        filename: str
-    ) -> Dict[str, Any]:
-        """Save uploaded audio file and return metadata."""
+    async def save_audio(self, upload: BinaryIO, filename: str) -> Dict[str, Any]:
+        """
+        Save an uploaded audio file and return metadata. upload is the
+        upload's file object; it is streamed to disk in chunks rather than
+        read into memory.
+        """
         # Validate file extension
         ext = Path(filename).suffix.lower()
         if ext not in self.ALLOWED_EXTENSIONS:
             raise ValueError(f"Invalid audio type. Allowed: {self.ALLOWED_EXTENSIONS}")
         
-        # Validate file size
-        if len(file_content) > self.MAX_FILE_SIZE:
-            raise ValueError(f"File too large. Maximum size: {self.MAX_FILE_SIZE // (1024*1024)}MB")
-        
         # Generate unique ID and path
         audio_id = str(uuid.uuid4())
         date_folder = datetime.now().strftime("%Y-%m-%d")
         save_dir = self.upload_dir / date_folder
-        save_dir.mkdir(parents=True, exist_ok=True)
+        if save_dir not in self._created_dirs:
+            save_dir.mkdir(parents=True, exist_ok=True)
+            self._created_dirs.add(save_dir)
         
         audio_path = save_dir / f"{audio_id}{ext}"
-        with open(audio_path, 'wb') as f:
-            f.write(file_content)
-        
-        # Estimate duration (rough estimate based on file size)
-        # More accurate duration requires audio parsing
-        estimated_duration = len(file_content) / 16000  # Rough estimate
+        file_size, content_hash, duration, waveform_path = await asyncio.to_thread(
+            self._store_upload, upload, audio_path
+        )
         
         return {
             "audio_id": audio_id,
             "audio_path": str(audio_path),
+            "waveform_path": waveform_path,
             "filename": filename,
-            "file_size": len(file_content),
-            "duration_seconds": estimated_duration,
+            "file_size": file_size,
+            "content_hash": content_hash,
+            "duration_seconds": duration,
             "uploaded_at": datetime.utcnow().isoformat(),
             "status": "uploaded"
         }
     
+    def _store_upload(
+        self, upload: BinaryIO, audio_path: Path
+    ) -> Tuple[int, str, float, Optional[str]]:
+        """
+        Blocking part of save_audio: copy the upload to audio_path in
+        chunks, enforcing MAX_FILE_SIZE and hashing as it goes. Returns
+        (file size, SHA-256 hex digest, duration in seconds, pre-decoded
+        waveform path).
+        """
+        file_size = 0
+        hasher = hashlib.sha256()
+        try:
+            with open(audio_path, 'wb') as f:
+                while chunk := upload.read(self.CHUNK_SIZE):
+                    file_size += len(chunk)
+                    # Validate file size
+                    if file_size > self.MAX_FILE_SIZE:
+                        raise ValueError(
+                            f"File too large. Maximum size: {self.MAX_FILE_SIZE // (1024*1024)}MB"
+                        )
+                    hasher.update(chunk)
+                    f.write(chunk)
+        except BaseException:
+            audio_path.unlink(missing_ok=True)
+            raise
+        
+        # Duration from the header, and Whisper-ready uploads pre-decoded once
+        duration, waveform_path = _inspect_audio(str(audio_path))
+        if duration is None:
+            # Unreadable header (e.g. m4a/webm): rough estimate from file size
+            duration = file_size / 16000
+        return file_size, hasher.hexdigest(), duration, waveform_path
+    
     async def transcribe(
         self, 
         audio_path: str,
-        language: str = "en"
+        language: str = "en",
+        waveform_path: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Transcribe audio using Whisper.
         Returns transcription text and extracted symptoms.
+        waveform_path is the pre-decoded input saved by save_audio, if any.
         """
-        model = _load_whisper_model()
+        loop = asyncio.get_running_loop()
+        # A first-call model load takes seconds; keep it off the event loop too
+        model = await loop.run_in_executor(WHISPER_POOL, _load_whisper_model)
         
         if model is None:
             # Fallback: return demo transcription if Whisper unavailable
             return self._demo_transcription()
         
-        # Check for FFmpeg (required by Whisper)
+        if waveform_path and not os.path.exists(waveform_path):
+            waveform_path = None
+        
+        # Check for FFmpeg (required by openai-whisper to decode files;
+        # faster-whisper decodes with PyAV)
         import shutil
-        if not shutil.which("ffmpeg"):
+        if (_whisper_backend == "openai-whisper" and not waveform_path
+                and not shutil.which("ffmpeg")):
             print("WARNING: FFmpeg not found. Falling back to demo transcription.")
             return self._demo_transcription()
         
         try:
             # Transcribe with Whisper
-            result = model.transcribe(
-                audio_path,
-                language=language,
-                fp16=False  # Use FP32 for CPU compatibility
+            result = await loop.run_in_executor(
+                WHISPER_POOL, partial(_run_whisper, model, audio_path, language, waveform_path)
             )
             
             transcription = result.get("text", "").strip()
@@ -161,37 +404,22 @@ class VoiceService:
     def _extract_symptoms(self, text: str) -> List[str]:
         """Extract symptom keywords from transcribed text."""
         text_lower = text.lower()
-        found_symptoms = []
         
-        for symptom in SYMPTOM_KEYWORDS:
-            if symptom in text_lower:
-                found_symptoms.append(symptom)
+        if _symptom_automaton is not None:
+            # Every keyword/phrase occurrence, overlapping ones included
+            found_symptoms = set()
+            for _, symptoms in _symptom_automaton.iter(text_lower):
+                found_symptoms.update(symptoms)
+            return list(found_symptoms)
         
-        # Also look for common phrases
-        phrase_mappings = {
-            "throwing up": "vomiting",
-            "threw up": "vomiting",
-            "not eating": "loss of appetite",
-            "won't eat": "loss of appetite",
-            "runny nose": "nasal discharge",
-            "runny eyes": "eye discharge",
-            "can't walk": "difficulty standing",
-            "trouble breathing": "breathing difficulty",
-            "losing weight": "weight loss",
-            "gained weight": "weight gain",
-            "drinking a lot": "drinking more",
-            "peeing a lot": "frequent urination",
-            "scratching a lot": "itching",
-            "losing hair": "hair loss",
-            "red skin": "redness",
-            "hot to touch": "fever"
-        }
+        found_symptoms = {symptom for symptom in SYMPTOM_KEYWORDS if symptom in text_lower}
         
-        for phrase, symptom in phrase_mappings.items():
-            if phrase in text_lower and symptom not in found_symptoms:
-                found_symptoms.append(symptom)
+        # Also look for common phrases
+        found_symptoms.update(
+            symptom for phrase, symptom in PHRASE_MAPPINGS.items() if phrase in text_lower
+        )
         
-        return list(set(found_symptoms))
+        return list(found_symptoms)
     
     def _calculate_confidence(self, text: str, symptoms: List[str]) -> float:
         """Calculate confidence score based on transcription quality."""
@@ -238,21 +466,30 @@ class VoiceService:
         from ..database import Database
         
         audio_collection = Database.get_collection("audio")
-        audio = await audio_collection.find_one({"audio_id": audio_id})
+        # Delete database record and fetch its file paths in one round trip
+        audio = await audio_collection.find_one_and_delete(
+            {"audio_id": audio_id},
+            projection={"audio_path": 1, "waveform_path": 1}
+        )
         
         if not audio:
             return False
         
-        # Delete file
-        if "audio_path" in audio:
-            try:
-                os.remove(audio["audio_path"])
-            except OSError:
-                pass
-        
-        # Delete database record
-        await audio_collection.delete_one({"audio_id": audio_id})
+        # Delete file (and its pre-decoded waveform) off the event loop
+        await asyncio.to_thread(
+            self._remove_files, [audio.get(k) for k in ("audio_path", "waveform_path")]
+        )
         return True
+    
+    @staticmethod
+    def _remove_files(paths: List[Optional[str]]):
+        """Best-effort removal of stored files."""
+        for path in paths:
+            if path:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
 
 
 # Singleton instance
@@ -0,0 +1,35 @@
+"""
+One-off packaging: combine the prediction service's pickled artifacts
+(encoders, TF-IDF vectorizer, vitals scaler, XGBoost model) into a
+single uncompressed joblib bundle.
+
+Usage:
+    python bundle_prediction_artifacts.py
+
+Writes trained_model/prediction_artifacts.joblib, which
+prediction_service.py loads (memory-mapping its numpy arrays) in place
+of the individual .pkl files when present. Re-run after retraining.
+"""
+import os
+import joblib
+
+MODEL_DIR = os.path.join(os.path.dirname(__file__), '..', 'trained_model')
+BUNDLE_PATH = os.path.join(MODEL_DIR, 'prediction_artifacts.joblib')
+ARTIFACT_FILES = {
+    'animal_encoder': 'animal_encoder.pkl',
+    'breed_encoder': 'breed_encoder.pkl',
+    'disease_encoder': 'disease_encoder.pkl',
+    'symptom_vectorizer': 'symptom_binarizer.pkl',
+    'vitals_scaler': 'vitals_scaler.pkl',
+    'model': 'vet_ai_model.pkl',
+}
+
+
+if __name__ == "__main__":
+    bundle = {
+        name: joblib.load(os.path.join(MODEL_DIR, filename))
+        for name, filename in ARTIFACT_FILES.items()
+    }
+    # compress=0 keeps numpy arrays as raw buffers so they can be mmap'd
+    joblib.dump(bundle, BUNDLE_PATH, compress=0)
+    print(f"Artifact bundle written to {BUNDLE_PATH}")
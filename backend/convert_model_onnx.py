@@ -0,0 +1,76 @@
+"""
+One-off conversion: export the DenseNet121 disease model to ONNX and
+statically quantize it to INT8 for CPU inference.
+
+Usage:
+    python convert_model_onnx.py <calibration_image_dir> [max_images]
+
+Writes Antigravity_Package/vet_densenet_model_int8.onnx, which
+image_service.py picks up automatically when onnxruntime is installed.
+Requires: tf2onnx, onnxruntime (offline only).
+"""
+import os
+import sys
+import cv2
+import numpy as np
+
+MODEL_DIR = os.path.join(os.path.dirname(__file__), 'Antigravity_Package')
+MODEL_PATH = os.path.join(MODEL_DIR, 'vet_densenet_model.keras')
+FP32_PATH = os.path.join(MODEL_DIR, 'vet_densenet_model_fp32.onnx')
+INT8_PATH = os.path.join(MODEL_DIR, 'vet_densenet_model_int8.onnx')
+INPUT_SIZE = 224
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp', '.webp'}
+
+
+def preprocess(image_path):
+    """Same preprocessing as inference.py: RGB, 224x224, float32 / 255."""
+    img = cv2.imread(image_path)
+    if img is None:
+        return None
+    img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+    img = cv2.resize(img, (INPUT_SIZE, INPUT_SIZE))
+    return np.expand_dims(np.array(img, dtype=np.float32) / 255.0, axis=0)
+
+
+def export_fp32():
+    import tensorflow as tf
+    import tf2onnx
+
+    model = tf.keras.models.load_model(MODEL_PATH)
+    spec = (tf.TensorSpec((None, INPUT_SIZE, INPUT_SIZE, 3), tf.float32, name="input"),)
+    tf2onnx.convert.from_keras(model, input_signature=spec, opset=17, output_path=FP32_PATH)
+    print(f"FP32 ONNX written to {FP32_PATH}")
+
+
+def quantize_int8(calibration_dir, max_images):
+    from onnxruntime.quantization import (
+        CalibrationDataReader, QuantType, quantize_static
+    )
+
+    paths = [
+        os.path.join(calibration_dir, f) for f in sorted(os.listdir(calibration_dir))
+        if os.path.splitext(f)[1].lower() in IMAGE_EXTENSIONS
+    ][:max_images]
+    if not paths:
+        raise SystemExit(f"No calibration images found in {calibration_dir}")
+
+    class VetImageReader(CalibrationDataReader):
+        def __init__(self):
+            self._batches = (b for b in map(preprocess, paths) if b is not None)
+
+        def get_next(self):
+            batch = next(self._batches, None)
+            return None if batch is None else {"input": batch}
+
+    quantize_static(
+        FP32_PATH, INT8_PATH, VetImageReader(),
+        weight_type=QuantType.QInt8, activation_type=QuantType.QInt8
+    )
+    print(f"INT8 ONNX written to {INT8_PATH} (calibrated on {len(paths)} images)")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        raise SystemExit(__doc__)
+    export_fp32()
+    quantize_int8(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else 200)
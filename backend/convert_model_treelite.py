@@ -0,0 +1,41 @@
+"""
+One-off conversion: compile the XGBoost disease predictor to a native
+shared library with Treelite/TL2cgen for faster single-row inference.
+
+Usage:
+    python convert_model_treelite.py [nthread]
+
+Writes trained_model/vet_ai_model.so, which prediction_service.py picks
+up automatically when tl2cgen is installed.
+Requires: treelite, tl2cgen, a C compiler (offline only).
+"""
+import os
+import sys
+import joblib
+
+MODEL_DIR = os.path.join(os.path.dirname(__file__), '..', 'trained_model')
+MODEL_PATH = os.path.join(MODEL_DIR, 'vet_ai_model.pkl')
+LIB_PATH = os.path.join(MODEL_DIR, 'vet_ai_model.so')
+
+
+def compile_model(nthread):
+    import treelite
+    import tl2cgen
+
+    model = joblib.load(MODEL_PATH)
+    booster = model.get_booster()
+    # predict_proba only uses trees up to best_iteration when the model was
+    # trained with early stopping; compile exactly those
+    best_iteration = getattr(model, 'best_iteration', None)
+    if best_iteration is not None:
+        booster = booster[: best_iteration + 1]
+    tl_model = treelite.frontend.from_xgboost(booster)
+    tl2cgen.export_lib(
+        tl_model, toolchain='gcc', libpath=LIB_PATH,
+        params={'parallel_comp': nthread}, verbose=False
+    )
+    print(f"Compiled predictor written to {LIB_PATH}")
+
+
+if __name__ == "__main__":
+    compile_model(int(sys.argv[1]) if len(sys.argv) > 1 else os.cpu_count() or 1)
@@ -0,0 +1,41 @@
+"""
+One-off conversion: export the XGBoost disease predictor to ONNX for
+low-overhead single-row inference with onnxruntime.
+
+Usage:
+    python convert_prediction_model_onnx.py
+
+Writes trained_model/vet_ai_model.onnx, which prediction_service.py
+picks up automatically when onnxruntime is installed.
+Requires: onnxmltools, onnxruntime (offline only).
+"""
+import os
+import joblib
+
+MODEL_DIR = os.path.join(os.path.dirname(__file__), '..', 'trained_model')
+MODEL_PATH = os.path.join(MODEL_DIR, 'vet_ai_model.pkl')
+ONNX_PATH = os.path.join(MODEL_DIR, 'vet_ai_model.onnx')
+
+
+def export_onnx():
+    from onnxmltools import convert_xgboost
+    from onnxmltools.convert.common.data_types import FloatTensorType
+
+    model = joblib.load(MODEL_PATH)
+    booster = model.get_booster()
+    # Same trees as predict_proba when trained with early stopping
+    best_iteration = getattr(model, 'best_iteration', None)
+    if best_iteration is not None:
+        booster = booster[: best_iteration + 1]
+
+    n_features = int(model.n_features_in_)
+    onnx_model = convert_xgboost(
+        booster, initial_types=[('input', FloatTensorType([None, n_features]))]
+    )
+    with open(ONNX_PATH, 'wb') as f:
+        f.write(onnx_model.SerializeToString())
+    print(f"ONNX model written to {ONNX_PATH}")
+
+
+if __name__ == "__main__":
+    export_onnx()
@@ -3,14 +3,42 @@ import os
 import json
 
 model_dir = os.path.join(os.path.dirname(__file__), '..', 'trained_model')
+bundle_path = os.path.join(model_dir, 'prediction_artifacts.joblib')
 output = []
 
 files = ['animal_encoder.pkl', 'breed_encoder.pkl', 'disease_encoder.pkl', 
          'symptom_binarizer.pkl', 'vitals_scaler.pkl']
 
+# Bundle keys (see bundle_prediction_artifacts.py) by .pkl file name
+bundle_keys = {
+    'animal_encoder.pkl': 'animal_encoder',
+    'breed_encoder.pkl': 'breed_encoder',
+    'disease_encoder.pkl': 'disease_encoder',
+    'symptom_binarizer.pkl': 'symptom_vectorizer',
+    'vitals_scaler.pkl': 'vitals_scaler',
+    'vet_ai_model.pkl': 'model',
+}
+
+# One file open when the bundle exists; numpy arrays are mmap'd, not copied
+bundle = None
+if os.path.exists(bundle_path):
+    try:
+        import warnings
+        warnings.filterwarnings('ignore')
+        bundle = joblib.load(bundle_path, mmap_mode='r')
+    except Exception as e:
+        print(f"Could not read {bundle_path}, loading .pkl files: {e}")
+
+
+def load_artifact(fname):
+    if bundle is not None:
+        return bundle[bundle_keys[fname]]
+    return joblib.load(os.path.join(model_dir, fname))
+
+
 for fname in files:
     try:
-        obj = joblib.load(os.path.join(model_dir, fname))
+        obj = load_artifact(fname)
         name = fname.replace('.pkl', '')
         info = {"name": name, "type": type(obj).__name__}
         if hasattr(obj, 'classes_'):
@@ -31,7 +59,7 @@ for fname in files:
 try:
     import warnings
     warnings.filterwarnings('ignore')
-    model = joblib.load(os.path.join(model_dir, 'vet_ai_model.pkl'))
+    model = load_artifact('vet_ai_model.pkl')
     info = {"name": "vet_ai_model", "type": type(model).__name__}
     if hasattr(model, 'n_features_in_'):
         info["n_features"] = int(model.n_features_in_)
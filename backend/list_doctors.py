@@ -23,8 +23,11 @@ async def list_doctors():
         # Get users collection
         users_collection = db["users"]
         
-        # Find doctors
-        cursor = users_collection.find({"role": "doctor"})
+        # Find doctors (only the printed fields; skips password hashes etc.)
+        cursor = users_collection.find(
+            {"role": "doctor"},
+            projection={"full_name": 1, "email": 1}
+        )
         doctors = await cursor.to_list(length=100)
         
         if not doctors:
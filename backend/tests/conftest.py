@@ -0,0 +1,44 @@
+"""
+Shared pytest fixtures: in-memory MongoDB and an authenticated doctor.
+"""
+
+import os
+import sys
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+from mongomock_motor import AsyncMongoMockClient
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import Database  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.user import User, UserRole  # noqa: E402
+from app.routers.dependencies import get_current_user  # noqa: E402
+from app.services.patient_service import PatientService  # noqa: E402
+
+
+@pytest.fixture
+def db():
+    """Point the app at a fresh in-memory database for each test."""
+    Database.db = AsyncMongoMockClient()["vetai_test"]
+    PatientService._collection = None
+    yield Database.db
+    Database.db = None
+    PatientService._collection = None
+
+
+@pytest.fixture
+def client(db):
+    """Test client authenticated as a doctor (lifespan startup is skipped)."""
+    doctor = User(
+        _id="test-doctor",
+        email="doctor@example.com",
+        full_name="Test Doctor",
+        role=UserRole.DOCTOR,
+        created_at=datetime.utcnow(),
+    )
+    app.dependency_overrides[get_current_user] = lambda: doctor
+    yield TestClient(app)
+    app.dependency_overrides.clear()
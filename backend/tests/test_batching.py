@@ -0,0 +1,49 @@
+"""
+MicroBatcher tests.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from app.services.batching import MicroBatcher
+
+
+def test_concurrent_requests_share_one_call_and_get_their_own_rows():
+    calls = []
+
+    def predict(batch):
+        calls.append(len(batch))
+        return batch * 10
+
+    batcher = MicroBatcher(predict, ThreadPoolExecutor(max_workers=1), max_size=8, max_wait_ms=50)
+
+    async def run():
+        return await asyncio.gather(
+            *(batcher.infer(np.array([[i, i + 1]], dtype=np.float32)) for i in range(5))
+        )
+
+    rows = asyncio.run(run())
+
+    assert calls == [5]
+    for i, row in enumerate(rows):
+        np.testing.assert_array_equal(row, [i * 10, (i + 1) * 10])
+
+
+def test_failed_call_fails_every_request_in_the_batch():
+    def predict(batch):
+        raise ValueError("model unavailable")
+
+    batcher = MicroBatcher(predict, ThreadPoolExecutor(max_workers=1), max_size=4, max_wait_ms=20)
+
+    async def run():
+        return await asyncio.gather(
+            *(batcher.infer(np.zeros((1, 3))) for _ in range(3)),
+            return_exceptions=True
+        )
+
+    results = asyncio.run(run())
+
+    assert len(results) == 3
+    assert all(isinstance(r, ValueError) for r in results)
@@ -0,0 +1,124 @@
+"""
+Image upload and analysis API tests.
+"""
+
+import io
+import os
+
+import cv2
+import numpy as np
+import pytest
+from PIL import Image
+
+from app.services import image_service
+
+
+CLASS_NAMES = [f"disease_{i}" for i in range(5)]
+
+
+@pytest.fixture
+def analyzer(monkeypatch, tmp_path):
+    """Image service writing to tmp_path, with the model swapped for fixed outputs."""
+    monkeypatch.setattr(image_service.image_analyzer, "upload_dir", tmp_path)
+    monkeypatch.setattr(image_service, "_load_disease_model", lambda: True)
+    monkeypatch.setattr(image_service, "_class_names", CLASS_NAMES)
+    monkeypatch.setattr(image_service, "_num_classes", len(CLASS_NAMES))
+    monkeypatch.setattr(image_service, "_prediction_cache", image_service.OrderedDict())
+
+    async def fake_infer(img_batch):
+        # More than 4 decimals, so unrounded confidences would show up
+        probs = np.linspace(1.0, 2.0, len(CLASS_NAMES), dtype=np.float32) / 7.0
+        return probs / probs.sum()
+
+    monkeypatch.setattr(image_service.inference_batcher, "infer", fake_infer)
+    return image_service.image_analyzer
+
+
+def _jpeg(size=(120, 60), orientation=None) -> bytes:
+    exif = Image.Exif()
+    if orientation is not None:
+        exif[0x0112] = orientation
+    buf = io.BytesIO()
+    Image.new("RGB", size, (180, 90, 60)).save(buf, "JPEG", exif=exif)
+    return buf.getvalue()
+
+
+def _upload(client, content: bytes) -> dict:
+    response = client.post(
+        "/images/upload",
+        files={"file": ("lesion.jpg", content, "image/jpeg")},
+        data={"image_type": "skin"},
+    )
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def test_upload_stores_raw_dimensions_for_exif_rotated_jpeg(client, analyzer):
+    # Orientation 6 displays rotated 90°, but the stored pixels are 120x60
+    metadata = _upload(client, _jpeg(orientation=6))
+
+    assert (metadata["width"], metadata["height"]) == (120, 60)
+    with Image.open(metadata["thumbnail_path"]) as thumb:
+        assert thumb.size == (120, 60)
+
+
+def test_analysis_stored_matches_response(client, analyzer):
+    image_id = _upload(client, _jpeg())["image_id"]
+
+    posted = client.post(f"/images/analyze/{image_id}")
+    assert posted.status_code == 200, posted.text
+    fetched = client.get(f"/images/{image_id}")
+    assert fetched.status_code == 200, fetched.text
+
+    analysis = fetched.json()["analysis"]
+    assert analysis["predictions"] == posted.json()["predictions"]
+    assert analysis["top_prediction"] == posted.json()["top_prediction"]
+    for pred in analysis["predictions"]:
+        assert pred["confidence"] == round(pred["confidence"], 4)
+
+
+def _large_fixture(path) -> str:
+    """Deterministic 2400x1800 photo-like JPEG: smooth color regions plus sensor noise."""
+    rng = np.random.default_rng(0)
+    coarse = rng.integers(0, 256, (45, 60, 3)).astype(np.uint8)
+    img = cv2.GaussianBlur(cv2.resize(coarse, (2400, 1800), interpolation=cv2.INTER_CUBIC), (0, 0), 3)
+    img = np.clip(img + rng.normal(0, 6, img.shape), 0, 255).astype(np.uint8)
+    cv2.imwrite(str(path), img, [cv2.IMWRITE_JPEG_QUALITY, 92])
+    return str(path)
+
+
+def _full_resolution_input(image_path: str) -> np.ndarray:
+    """Model input built as training/inference.py does: full decode, then resize."""
+    img = cv2.cvtColor(cv2.imread(image_path), cv2.COLOR_BGR2RGB)
+    img = cv2.resize(img, (image_service.INPUT_SIZE, image_service.INPUT_SIZE))
+    return (img.astype(np.float32) / 255.0)[None]
+
+
+def _reduced_decode_input(image_path: str) -> np.ndarray:
+    analyzer = image_service.image_analyzer
+    decoded = analyzer._decode_for_analysis(image_path)
+    assert decoded.shape[:2] == (450, 600)  # decoded at 1/4 scale
+    return analyzer._preprocess_for_model(decoded)
+
+
+def test_reduced_decode_keeps_model_input_close(tmp_path):
+    image_path = _large_fixture(tmp_path / "large.jpg")
+
+    diff = np.abs(_reduced_decode_input(image_path) - _full_resolution_input(image_path))
+
+    # Different downsampling filters: pixels shift by a couple of levels of 255
+    assert diff.mean() < 0.015
+
+
+def test_reduced_decode_keeps_predictions_within_tolerance(tmp_path):
+    pytest.importorskip("tensorflow")
+    if not os.path.exists(image_service.MODEL_PATH):
+        pytest.skip("DenseNet121 model file not available")
+    _, predict = image_service._load_keras_model()
+    image_path = _large_fixture(tmp_path / "large.jpg")
+
+    reduced = predict(_reduced_decode_input(image_path))[0]
+    full = predict(_full_resolution_input(image_path))[0]
+
+    assert reduced.argmax() == full.argmax()
+    np.testing.assert_allclose(reduced, full, atol=0.02)
@@ -0,0 +1,61 @@
+"""
+Patient search and update API tests.
+"""
+
+import asyncio
+
+from bson import ObjectId
+
+
+def _create(client, name: str, owner_name: str = "Jane Doe", species: str = "dog"):
+    response = client.post("/patients/", json={
+        "name": name,
+        "species": species,
+        "weight_kg": 12.5,
+        "age_months": 24,
+        "owner": {"name": owner_name, "phone": "5551234567"},
+    })
+    assert response.status_code == 201, response.text
+
+
+def test_search_matches_partial_names_alongside_exact_word(client):
+    for name in ("Max", "Maxwell", "Maxine", "Bella"):
+        _create(client, name)
+
+    response = client.get("/patients/", params={"q": "Max"})
+
+    assert response.status_code == 200, response.text
+    assert sorted(p["name"] for p in response.json()) == ["Max", "Maxine", "Maxwell"]
+
+
+def test_search_matches_owner_name_and_escapes_input(client):
+    _create(client, "Rex", owner_name="Sam O'Neil (Jr.)")
+    _create(client, "Luna", owner_name="Samuel Smith")
+
+    by_owner = client.get("/patients/", params={"q": "o'neil (jr"})
+    assert [p["name"] for p in by_owner.json()] == ["Rex"]
+
+    # a pattern metacharacter must be matched literally, not as a wildcard
+    assert client.get("/patients/", params={"q": "S.m"}).json() == []
+
+
+def test_owner_update_stores_nested_fields_as_given(client, db):
+    created = client.post("/patients/", json={
+        "name": "Rex",
+        "species": "dog",
+        "weight_kg": 20.0,
+        "age_months": 36,
+        "owner": {"name": "Jane Doe", "phone": "5551234567", "email": "jane@example.com"},
+    }).json()
+
+    response = client.put(f"/patients/{created['_id']}", json={
+        "owner": {"name": "Jane Doe", "phone": "5551234567", "email": None},
+    })
+
+    assert response.status_code == 200, response.text
+    assert response.json()["name"] == "Rex"
+    stored = asyncio.run(db.patients.find_one({"_id": ObjectId(created["_id"])}))
+    # The whole owner is replaced, with its None fields kept explicitly
+    assert stored["owner"] == {
+        "name": "Jane Doe", "phone": "5551234567", "email": None, "address": None
+    }
@@ -0,0 +1,64 @@
+"""
+Disease prediction artifact loading and result-cache tests.
+"""
+
+import os
+import subprocess
+import sys
+from collections import OrderedDict
+
+import numpy as np
+import pytest
+
+from app.services import prediction_service
+
+
+@pytest.fixture
+def ranked(monkeypatch):
+    """Loaded-model state with ranking stubbed out and an empty result cache."""
+    monkeypatch.setattr(prediction_service, "_model", object())
+    monkeypatch.setattr(prediction_service, "_result_cache", OrderedDict())
+    monkeypatch.setattr(prediction_service.settings, "PREDICTION_CACHE_SIZE", 8)
+    monkeypatch.setattr(
+        prediction_service, "_rank_predictions",
+        lambda kb_scores, probabilities, species, symptoms, top_n: [
+            {"disease_name": "Parvovirus", "boosted": probabilities is not None}
+        ]
+    )
+    return prediction_service._result_cache
+
+
+def _finish(key, feature_vector, probabilities):
+    return prediction_service._finish_prediction(
+        key, (), feature_vector, probabilities, "dog", ["vomiting"], 3
+    )
+
+
+def test_failed_model_call_is_not_cached(ranked):
+    results = _finish("failed", np.zeros((1, 4)), None)
+
+    assert results == [{"disease_name": "Parvovirus", "boosted": False}]
+    assert "failed" not in ranked
+
+
+def test_model_and_kb_only_results_are_cached(ranked):
+    _finish("boosted", np.zeros((1, 4)), np.array([0.7, 0.3]))
+    # No KB match: the model is skipped on purpose, and that result is final
+    _finish("no-match", None, None)
+
+    assert list(ranked) == ["boosted", "no-match"]
+
+
+def test_artifacts_load_in_a_fresh_process():
+    # sklearn/xgboost must not be imported yet, as at server startup, so
+    # the concurrent unpickling path is exercised from a clean interpreter
+    if not os.path.exists(os.path.join(prediction_service.MODEL_DIR, "vet_ai_model.pkl")):
+        pytest.skip("trained prediction model not available")
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run(
+        [sys.executable, "-c",
+         "from app.services import prediction_service as p; "
+         "raise SystemExit(0 if p._load_artifacts() else 1)"],
+        cwd=backend_dir, capture_output=True, text=True, timeout=300
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
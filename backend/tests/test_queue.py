@@ -0,0 +1,34 @@
+"""
+Queue token numbering tests.
+"""
+
+import asyncio
+from datetime import datetime
+
+from app.config import get_settings
+from app.services.queue_service import QueueService
+
+
+def _prefix() -> str:
+    return f"{get_settings().TOKEN_PREFIX}-{datetime.utcnow().strftime('%Y%m%d')}-"
+
+
+def test_token_numbers_continue_after_pre_counter_tokens(db):
+    prefix = _prefix()
+
+    async def run():
+        await db.tokens.insert_many([
+            {"token_number": f"{prefix}{n:03d}"} for n in (1, 2, 5)
+        ])
+        return await asyncio.gather(
+            *(QueueService._get_next_token_number() for _ in range(4))
+        )
+
+    issued = asyncio.run(run())
+
+    assert sorted(issued) == [f"{prefix}{n:03d}" for n in (6, 7, 8, 9)]
+
+
+def test_token_numbers_start_at_one_on_a_fresh_day(db):
+    first = asyncio.run(QueueService._get_next_token_number())
+    assert first == f"{_prefix()}001"
@@ -0,0 +1,45 @@
+"""
+Startup warm-up tests: a broken model backend must not abort startup.
+"""
+
+from app.services import image_service, prediction_service, voice_service
+
+
+def _raise(*args, **kwargs):
+    raise RuntimeError("backend unavailable")
+
+
+def test_prediction_warm_up_survives_a_failing_backend(monkeypatch):
+    monkeypatch.setattr(prediction_service, "_load_artifacts", lambda: True)
+    monkeypatch.setattr(prediction_service, "_n_features", 4)
+    monkeypatch.setattr(prediction_service, "_predict_proba", _raise)
+
+    prediction_service.warm_up_prediction_model()
+
+
+def test_image_warm_up_survives_a_failing_backend(monkeypatch):
+    monkeypatch.setattr(image_service, "_load_disease_model", lambda: True)
+    monkeypatch.setattr(image_service, "_predict_fn", _raise)
+
+    image_service.warm_up_disease_model()
+
+
+def test_whisper_warm_up_falls_back_to_cpu_when_cuda_fails(monkeypatch):
+    loads = []
+
+    def create(model_size, device=None):
+        loads.append(device)
+        resolved = device or "cuda"
+        return f"model-{resolved}", "faster-whisper", resolved
+
+    monkeypatch.setattr(voice_service, "_whisper_model", None)
+    monkeypatch.setattr(voice_service, "_whisper_backend", None)
+    monkeypatch.setattr(voice_service, "_whisper_device", "cpu")
+    monkeypatch.setattr(voice_service, "_create_whisper_model", create)
+    monkeypatch.setattr(voice_service, "_run_whisper", _raise)
+
+    voice_service.warm_up_whisper_model()
+
+    assert loads == [None, "cpu"]
+    assert voice_service._whisper_model == "model-cpu"
+    assert voice_service._whisper_device == "cpu"